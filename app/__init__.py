@@ -8,9 +8,34 @@ This application uses the Flask App Factory pattern to support:
 - Flexible deployment options
 """
 
-from flask import Flask
+from flask import Flask, render_template
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 import os
+import sys
+import traceback
+
+# Storage format for date columns, parsed by the `date` template filter
+DB_DATE_FORMAT = '%Y-%m-%d'
+
+# (threshold, format) tiers for the abbreviated currency filters, largest first
+CURRENCY_TIERS = (
+    (1_000_000, '${:,.1f}M'),
+    (1_000, '${:,.0f}K'),
+)
+CURRENCY_SHORT_TIERS = ((1_000_000_000, '${:,.1f}B'),) + CURRENCY_TIERS
+
+
+def _format_currency(value, tiers) -> str:
+    """Format a dollar amount using the first tier whose threshold it meets."""
+    if value is None:
+        return '$0'
+    magnitude = abs(value)
+    for threshold, fmt in tiers:
+        if magnitude >= threshold:
+            return fmt.format(value / threshold)
+    return f'${value:,.0f}'
 
 
 def create_app(county: str = None, config_override: dict = None):
@@ -35,9 +60,9 @@ def create_app(county: str = None, config_override: dict = None):
     from app.config import load_config
     config = load_config(county)
 
-    # Apply any overrides
+    # Apply any overrides (copy first; the loaded config is cached and shared)
     if config_override:
-        config.update(config_override)
+        config = {**config, **config_override}
 
     # Store config in app
     app.config.update(config)
@@ -58,28 +83,40 @@ def create_app(county: str = None, config_override: dict = None):
     # Register error handlers
     _register_error_handlers(app)
 
+    # Compile templates up front so first page views don't pay for it
+    _preload_templates(app)
+
     return app
 
 
 def _init_extensions(app):
     """Initialize Flask extensions."""
     # Add extensions here as needed (e.g., Flask-SQLAlchemy, Flask-Login)
-    pass
+    from app.database import init_app as init_database
+    init_database(app)
+
+    from app.cache import init_app as init_cache
+    init_cache(app)
+
+
+def _preload_templates(app):
+    """
+    Compile every template into the Jinja cache at startup. Outside debug
+    mode Jinja does not re-check template files, so these are reused as-is.
+    """
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
 
 
 def _register_filters(app):
     """Register Jinja2 template filters."""
 
+    # List pages repeat the same amounts many times, so formatted values are cached
     @app.template_filter('currency')
+    @lru_cache(maxsize=4096)
     def currency_filter(value):
         """Format as currency."""
-        if value is None:
-            return '$0'
-        if abs(value) >= 1_000_000:
-            return f'${value/1_000_000:,.1f}M'
-        elif abs(value) >= 1_000:
-            return f'${value/1_000:,.0f}K'
-        return f'${value:,.0f}'
+        return _format_currency(value, CURRENCY_TIERS)
 
     @app.template_filter('currency_full')
     def currency_full_filter(value):
@@ -89,19 +126,13 @@ def _register_filters(app):
         return f'${value:,.0f}'
 
     @app.template_filter('currency_short')
+    @lru_cache(maxsize=4096)
     def currency_short_filter(value):
         """Format as abbreviated currency for large displays."""
-        if value is None:
-            return '$0'
-        if abs(value) >= 1_000_000_000:
-            return f'${value/1_000_000_000:,.1f}B'
-        elif abs(value) >= 1_000_000:
-            return f'${value/1_000_000:,.1f}M'
-        elif abs(value) >= 1_000:
-            return f'${value/1_000:,.0f}K'
-        return f'${value:,.0f}'
+        return _format_currency(value, CURRENCY_SHORT_TIERS)
 
     @app.template_filter('percent')
+    @lru_cache(maxsize=4096)
     def percent_filter(value):
         """Format as percentage."""
         if value is None:
@@ -114,9 +145,8 @@ def _register_filters(app):
         if value is None:
             return ''
         if isinstance(value, str):
-            from datetime import datetime
             try:
-                value = datetime.strptime(value, '%Y-%m-%d')
+                value = datetime.strptime(value, DB_DATE_FORMAT)
             except ValueError:
                 return value
         return value.strftime(format)
@@ -141,24 +171,18 @@ def _register_blueprints(app):
 
 def _register_error_handlers(app):
     """Register error handlers."""
-    import traceback
-    import sys
-
     @app.errorhandler(404)
     def not_found_error(error):
-        from flask import render_template
         return render_template('errors/404.html', title='Page Not Found'), 404
 
     @app.errorhandler(500)
     def internal_error(error):
-        from flask import render_template
         print(f"500 ERROR: {error}", file=sys.stderr, flush=True)
         traceback.print_exc()
         return render_template('errors/500.html', title='Server Error'), 500
 
     @app.errorhandler(Exception)
     def handle_exception(error):
-        from flask import render_template
         print(f"UNHANDLED EXCEPTION: {error}", file=sys.stderr, flush=True)
         traceback.print_exc()
         return render_template('errors/500.html', title='Server Error'), 500
@@ -0,0 +1,85 @@
+"""
+In-process memoization for dashboard aggregate queries.
+
+Aggregates are the same for every visitor between data loads, so they are
+kept per app for a short time instead of being re-queried on every page view.
+"""
+
+import time
+from functools import wraps
+from flask import current_app, has_app_context, request
+
+# Seconds a memoized aggregate is served before it is re-queried
+DEFAULT_TIMEOUT = 60
+
+
+def init_app(app):
+    """Attach an empty query cache to the app."""
+    app.extensions['query_cache'] = {}
+
+
+def memoize(timeout: int = DEFAULT_TIMEOUT):
+    """
+    Cache the result of a `func(cursor, *args)` query helper per app.
+
+    The cursor is not part of the cache key. Cached results are shared
+    between requests, so callers must treat them as read-only. Outside an
+    app context (e.g. from scripts) the helper runs uncached.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(cursor, *args):
+            if not has_app_context() or 'query_cache' not in current_app.extensions:
+                return func(cursor, *args)
+
+            cache = current_app.extensions['query_cache']
+            key = (wrapper, args)
+            now = time.monotonic()
+            entry = cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+
+            result = func(cursor, *args)
+            cache[key] = (now + timeout, result)
+            return result
+        return wrapper
+    return decorator
+
+
+def cached_view(timeout: int = DEFAULT_TIMEOUT):
+    """
+    Cache a view's rendered 200 response body per app, keyed by request
+    path. Only for public pages whose output does not depend on the query
+    string, session or visitor. Cleared along with the query cache.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('query_cache')
+            if cache is None:
+                return view(*args, **kwargs)
+
+            key = (wrapper, request.path)
+            now = time.monotonic()
+            entry = cache.get(key)
+            if entry is not None and entry[0] > now:
+                return current_app.response_class(entry[1], mimetype=entry[2])
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                cache[key] = (now + timeout, response.get_data(), response.mimetype)
+            return response
+        return wrapper
+    return decorator
+
+
+def delete_memoized(*funcs):
+    """Drop cached results for the given memoized helpers or views (all if none given)."""
+    cache = current_app.extensions.get('query_cache')
+    if not cache:
+        return
+    if not funcs:
+        cache.clear()
+        return
+    for key in [k for k in cache if k[0] in funcs]:
+        cache.pop(key, None)
@@ -4,9 +4,20 @@ Loads default config and merges with county-specific settings.
 """
 
 import os
+import re
 import yaml
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+# Use the libyaml-backed loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Matches ${VAR_NAME} placeholders in config values
+_ENV_VAR_RE = re.compile(r'\$\{([^}]+)\}')
+
+# Parsed YAML files keyed by path: (st_mtime_ns, data)
+_yaml_cache: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
 
 
 def get_config_path() -> Path:
@@ -20,12 +31,40 @@ def get_config_path() -> Path:
 
 
 def load_yaml(filepath: Path) -> Dict[str, Any]:
-    """Load a YAML file and return as dictionary."""
-    if not filepath.exists():
+    """
+    Load a YAML file and return as dictionary.
+    The parsed result is cached and only re-read when the file's mtime changes,
+    so callers must not mutate it.
+    """
+    try:
+        mtime = os.stat(filepath).st_mtime_ns
+    except FileNotFoundError:
         return {}
 
+    cached = _yaml_cache.get(filepath)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
     with open(filepath, 'r', encoding='utf-8') as f:
-        return yaml.safe_load(f) or {}
+        data = yaml.load(f, Loader=_YamlLoader) or {}
+
+    _yaml_cache[filepath] = (mtime, data)
+    return data
+
+
+def _merge_into(dst: Dict, src: Dict, convert=None):
+    """
+    Recursively merge src into dst in place, creating fresh nested dicts.
+    Non-dict values are passed through convert, if given, before storing.
+    """
+    for key, value in src.items():
+        if isinstance(value, dict):
+            target = dst.get(key)
+            if not isinstance(target, dict):
+                target = dst[key] = {}
+            _merge_into(target, value, convert)
+        else:
+            dst[key] = value if convert is None else convert(value)
 
 
 def deep_merge(base: Dict, override: Dict) -> Dict:
@@ -33,15 +72,48 @@ def deep_merge(base: Dict, override: Dict) -> Dict:
     Deep merge two dictionaries.
     Values in override take precedence over base.
     """
-    result = base.copy()
+    result = {}
+    _merge_into(result, base)
+    _merge_into(result, override)
+    return result
+
+
+def _resolve_scalar(value):
+    """Substitute ${VAR} placeholders in a single (non-container) value."""
+    if isinstance(value, str):
+        return _ENV_VAR_RE.sub(lambda m: os.environ.get(m.group(1), ''), value)
+    return value
 
-    for key, value in override.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = deep_merge(result[key], value)
+
+def _resolve_value(value):
+    """
+    Substitute ${VAR} placeholders in a config value, copying containers.
+
+    Walks nested dicts/lists with an explicit stack rather than recursion;
+    the input is never modified.
+    """
+    holder = [None]
+    stack = [(holder, 0, value)]
+
+    while stack:
+        parent, key, item = stack.pop()
+        if isinstance(item, dict):
+            copy = parent[key] = dict.fromkeys(item)
+            children = item.items()
+        elif isinstance(item, list):
+            copy = parent[key] = [None] * len(item)
+            children = enumerate(item)
         else:
-            result[key] = value
+            parent[key] = _resolve_scalar(item)
+            continue
 
-    return result
+        for child_key, child in children:
+            if isinstance(child, (dict, list)):
+                stack.append((copy, child_key, child))
+            else:
+                copy[child_key] = _resolve_scalar(child)
+
+    return holder[0]
 
 
 def resolve_env_vars(config: Dict) -> Dict:
@@ -49,30 +121,28 @@ def resolve_env_vars(config: Dict) -> Dict:
     Resolve environment variable placeholders in config.
     Supports ${VAR_NAME} syntax.
     """
-    import re
-
-    def resolve_value(value):
-        if isinstance(value, str):
-            # Find all ${VAR} patterns
-            pattern = r'\$\{([^}]+)\}'
-            matches = re.findall(pattern, value)
-            for match in matches:
-                env_value = os.environ.get(match, '')
-                value = value.replace(f'${{{match}}}', env_value)
-            return value
-        elif isinstance(value, dict):
-            return {k: resolve_value(v) for k, v in value.items()}
-        elif isinstance(value, list):
-            return [resolve_value(item) for item in value]
-        return value
-
-    return resolve_value(config)
+    return _resolve_value(config)
+
+
+def deep_merge_resolve(base: Dict, override: Dict) -> Dict:
+    """
+    Deep merge two dictionaries and resolve ${VAR} placeholders as values
+    are stored. Equivalent to resolve_env_vars(deep_merge(base, override)).
+    """
+    result = {}
+    _merge_into(result, base, _resolve_value)
+    _merge_into(result, override, _resolve_value)
+    return result
 
 
+@lru_cache(maxsize=16)
 def load_config(county: str = 'marion') -> Dict[str, Any]:
     """
     Load configuration for a specific county.
 
+    Results are cached per county; callers must treat the returned
+    dictionary as read-only. Use load_config.cache_clear() to force a reload.
+
     Args:
         county: County name (lowercase), e.g., 'marion', 'citrus'
 
@@ -87,13 +157,8 @@ def load_config(county: str = 'marion') -> Dict[str, Any]:
     # Load county-specific config
     county_config = load_yaml(config_path / 'counties' / f'{county.lower()}.yaml')
 
-    # Merge configs (county overrides default)
-    merged = deep_merge(default_config, county_config)
-
-    # Resolve environment variables
-    resolved = resolve_env_vars(merged)
-
-    return resolved
+    # Merge configs (county overrides default) and resolve environment variables
+    return deep_merge_resolve(default_config, county_config)
 
 
 def get_database_path(config: Dict) -> Path:
@@ -3,36 +3,167 @@ Database utilities for the Surtax Oversight application.
 """
 
 import sqlite3
+import threading
 from pathlib import Path
-from flask import g, current_app
+from typing import Union
+from flask import g, current_app, request, has_request_context
 from contextlib import contextmanager
 
+from app.services.rollups import refresh_stale_rollups
+
+# Request methods served from the worker thread's read-only connection
+READ_ONLY_METHODS = frozenset(['GET', 'HEAD'])
+
+# Per-connection tuning for the read-heavy dashboard workload
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',     # 64 MB page cache (allocated as used)
+    'PRAGMA mmap_size=268435456',   # 256 MB memory-mapped I/O
+)
+
+# Prepared statements kept per connection (sqlite3 default: 128), so the
+# filter and rollup-source variants built at runtime do not evict each other.
+STATEMENT_CACHE_SIZE = 256
+
+# Active surtax projects: the filter shared by the dashboard queries. A
+# TEMP view is created on each connection, so it works against read-only
+# databases and ones the migration has not touched; SQLite flattens it into
+# the outer query, so plans (and the partial indexes) are unchanged.
+LIVE_CONTRACTS_VIEW = '''
+    CREATE TEMP VIEW IF NOT EXISTS live_contracts AS
+    SELECT * FROM contracts
+    WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+'''
+
+_wal_enabled = set()
+
 
 def get_db_path() -> Path:
     """Get database path from current app config."""
-    from app.config import get_database_path
-    return get_database_path(current_app.config)
+    return Path(current_app.config['_DB_PATH_STR'])
+
+
+def configure_connection(conn: sqlite3.Connection, db_path: Union[str, Path], readonly: bool = False):
+    """
+    Apply connection PRAGMAs and create the live_contracts view. WAL mode is
+    persistent in the database file, so it is only switched on once per path
+    from a writable connection.
+    """
+    db_key = str(db_path)
+    if not readonly and db_key not in _wal_enabled:
+        conn.execute('PRAGMA journal_mode=WAL')
+        _wal_enabled.add(db_key)
+
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+    conn.execute(LIVE_CONTRACTS_VIEW)
+
+    # Reject writes at the SQL level too, not just via the URI open mode
+    if readonly:
+        conn.execute('PRAGMA query_only=ON')
 
 
 def get_db():
     """
     Get database connection for the current request.
-    Creates a new connection if one doesn't exist.
-    """
-    if 'db' not in g:
-        db_path = get_db_path()
 
-        # Ensure directory exists
-        db_path.parent.mkdir(parents=True, exist_ok=True)
+    GET/HEAD requests share their worker thread's read-only connection;
+    other requests get their own writable connection, created on first use.
+    """
+    if has_request_context() and request.method in READ_ONLY_METHODS:
+        readonly_db = get_readonly_db()
+        if readonly_db is not None:
+            return readonly_db
 
-        g.db = sqlite3.connect(str(db_path))
+    if 'db' not in g:
+        db_path = current_app.config['_DB_PATH_STR']
+        g.db = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
         g.db.row_factory = sqlite3.Row
+        configure_connection(g.db, db_path)
 
     return g.db
 
 
+def get_readonly_db():
+    """
+    Get this worker thread's read-only connection, opening it on first use.
+
+    The connection is reused by every GET/HEAD request the thread serves, so
+    connect, PRAGMA and temp-view setup run once per thread. It is not
+    shared across threads: a slow reader on one thread never pins the
+    snapshot another thread sees. Returns None if the database file does
+    not exist yet.
+    """
+    local = current_app.extensions['ro_db']
+    conn = getattr(local, 'conn', None)
+    if conn is not None:
+        return conn
+
+    db_path = get_db_path()
+    if not db_path.exists():
+        return None
+
+    conn = sqlite3.connect(f'{db_path.resolve().as_uri()}?mode=ro', uri=True,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+    configure_connection(conn, db_path, readonly=True)
+    local.conn = conn
+    return conn
+
+
+def has_table(cursor: sqlite3.Cursor, name: str) -> bool:
+    """
+    Check whether a table exists. Only positive results are remembered per
+    app: import and migration scripts can create tables while the app runs.
+    """
+    known = current_app.extensions.setdefault('known_tables', set())
+    if name in known:
+        return True
+
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,))
+    if cursor.fetchone() is None:
+        return False
+
+    known.add(name)
+    return True
+
+
+def tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """
+    Get a cursor that returns plain tuples instead of sqlite3.Row, for hot
+    loops that only unpack rows positionally.
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def iter_rows(cursor: sqlite3.Cursor, size: int = 256):
+    """
+    Yield rows from an executed cursor in fetchmany() batches, so listing
+    pages can hand rows to the template without materialising the full list.
+    """
+    while True:
+        rows = cursor.fetchmany(size)
+        if not rows:
+            return
+        yield from rows
+
+
+def commit_db(conn: sqlite3.Connection):
+    """
+    Commit a write request. Rollups flagged stale by contract changes, made
+    by this request or by an import outside the app, are rebuilt first in
+    the same transaction so readers go back to the rollup tables.
+    """
+    refresh_stale_rollups(conn)
+    conn.commit()
+
+
 def close_db(e=None):
-    """Close database connection at end of request."""
+    """Close the request's writable connection at end of request."""
     db = g.pop('db', None)
     if db is not None:
         db.close()
@@ -57,8 +188,9 @@ def get_db_connection(db_path: Path = None):
         config = load_config()
         db_path = get_database_path(config)
 
-    conn = sqlite3.connect(str(db_path))
+    conn = sqlite3.connect(str(db_path), cached_statements=STATEMENT_CACHE_SIZE)
     conn.row_factory = sqlite3.Row
+    configure_connection(conn, db_path)
 
     try:
         yield conn
@@ -88,4 +220,14 @@ def init_db(db_path: Path = None):
 
 def init_app(app):
     """Initialize database handling for Flask app."""
+    from app.config import get_database_path
+
+    # Resolve the database path once instead of on every request
+    db_path = get_database_path(app.config)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    app.config['_DB_PATH_STR'] = str(db_path)
+
+    # Read-only connections, one per worker thread (see get_readonly_db)
+    app.extensions['ro_db'] = threading.local()
+
     app.teardown_appcontext(close_db)
@@ -0,0 +1,26 @@
+"""
+JSON response helpers shared by the route blueprints.
+Uses orjson when it is installed and falls back to the standard library.
+"""
+
+import json
+
+from flask import current_app
+
+try:
+    import orjson
+except ImportError:  # optional C-accelerated encoder
+    orjson = None
+
+
+def json_bytes(obj) -> bytes:
+    """Serialize to compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(obj, status: int = 200):
+    """Build a JSON response without going through jsonify."""
+    return current_app.response_class(json_bytes(obj), status=status,
+                                      mimetype='application/json')
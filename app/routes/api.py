@@ -2,13 +2,28 @@
 API routes: JSON endpoints for AJAX calls and integrations
 """
 
-from flask import Blueprint, jsonify, request, session
-from app.database import get_db
+from flask import Blueprint, Response, jsonify, request, session
+from app.database import commit_db, get_db, iter_rows, tuple_cursor
+from app.cache import delete_memoized
+from app.responses import json_bytes, json_response
+from app.services.stats import get_contract_summary
 from app.services.ai_chat import process_question
-from app.services.email_alerts import EmailAlertService, check_and_send_alerts
+from app.services.watchlist import (
+    get_watched_ids, get_watchlist_token, import_session_watchlist,
+    LEGACY_WATCHLIST_KEY
+)
 
 api_bp = Blueprint('api', __name__)
 
+# Summary row columns returned by /api/stats and /api/overview
+API_STAT_KEYS = (
+    'total_projects', 'total_budget', 'total_spent', 'active_projects',
+    'completed_projects', 'delayed_projects', 'over_budget_projects',
+)
+
+# Most projects returned by one /api/projects or /api/overview request
+MAX_PROJECTS_PAGE = 500
+
 
 @api_bp.route('/ask', methods=['POST'])
 def api_ask():
@@ -24,27 +39,65 @@ def api_ask():
 
     result = process_question(question, cursor)
 
-    return jsonify(result)
+    return json_response(result)
 
 
-@api_bp.route('/projects')
-def api_projects():
-    """Get projects as JSON."""
-    conn = get_db()
-    cursor = conn.cursor()
+def _fetch_projects(conn, limit: int = -1, offset: int = 0) -> list:
+    """
+    Fetch active surtax projects as dicts, largest first (limit -1 = no limit).
 
+    Uses a plain-tuple cursor and zips with the column names, which is
+    cheaper than building dicts from sqlite3.Row objects. Rows are read in
+    fetchmany() batches and the statement is finished before returning, so
+    callers never hold a read snapshot open while writing the response.
+    """
+    cursor = tuple_cursor(conn)
     cursor.execute('''
         SELECT
             id, title, school_name, vendor_name, status,
             surtax_category, current_amount, percent_complete,
             is_delayed, delay_days, is_over_budget, budget_variance_pct
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        FROM live_contracts
         ORDER BY current_amount DESC
-    ''')
+        LIMIT ? OFFSET ?
+    ''', (limit, offset))
 
-    projects = [dict(row) for row in cursor.fetchall()]
-    return jsonify({'projects': projects})
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in iter_rows(cursor)]
+
+
+def _fetch_stats(cursor):
+    """Fetch summary statistics for active surtax projects."""
+    summary = get_contract_summary(cursor)
+    return {key: summary.get(key) for key in API_STAT_KEYS}
+
+
+@api_bp.route('/projects')
+def api_projects():
+    """
+    Get projects as JSON.
+
+    The page is fetched up front and only the JSON encoding is streamed.
+    Optional ?limit= (at most MAX_PROJECTS_PAGE, the default) and ?offset=
+    parameters page through the results.
+    """
+    limit = request.args.get('limit', MAX_PROJECTS_PAGE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+    if limit < 1 or offset < 0:
+        return jsonify({'error': 'limit must be positive and offset non-negative'}), 400
+    limit = min(limit, MAX_PROJECTS_PAGE)
+
+    projects = _fetch_projects(get_db(), limit, offset)
+
+    def generate():
+        yield b'{"projects":['
+        separator = b''
+        for project in projects:
+            yield separator + json_bytes(project)
+            separator = b','
+        yield b']}'
+
+    return Response(generate(), mimetype='application/json')
 
 
 @api_bp.route('/stats')
@@ -53,76 +106,119 @@ def api_stats():
     conn = get_db()
     cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total_projects,
-            SUM(current_amount) as total_budget,
-            SUM(total_paid) as total_spent,
-            SUM(CASE WHEN status = 'Active' THEN 1 ELSE 0 END) as active_projects,
-            SUM(CASE WHEN status = 'Completed' THEN 1 ELSE 0 END) as completed_projects,
-            SUM(CASE WHEN is_delayed = 1 THEN 1 ELSE 0 END) as delayed_projects,
-            SUM(CASE WHEN is_over_budget = 1 THEN 1 ELSE 0 END) as over_budget_projects
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-
-    stats = dict(cursor.fetchone())
+    stats = _fetch_stats(cursor)
     return jsonify(stats)
 
 
+@api_bp.route('/overview')
+def api_overview():
+    """Get summary statistics and the largest projects in a single request."""
+    limit = min(max(request.args.get('limit', 25, type=int), 1), MAX_PROJECTS_PAGE)
+
+    conn = get_db()
+    cursor = conn.cursor()
+
+    stats = _fetch_stats(cursor)
+    projects = _fetch_projects(conn, limit)
+    return json_response({'stats': stats, 'projects': projects})
+
+
 # Watchlist API endpoints
+# Watched contract IDs live in the user_watchlist table; the session cookie
+# only carries an opaque watchlist token (see app.services.watchlist).
+
+# Pre-built response bodies for the write endpoints
+_WATCHLIST_OK = b'{"success":true,"count":%d}'
+_WATCHLIST_TOGGLED = b'{"success":true,"is_watched":%s,"count":%d}'
+
+
+def _watchlist_ok(count: int) -> Response:
+    """JSON response for a successful watchlist update."""
+    return Response(_WATCHLIST_OK % count, mimetype='application/json')
+
+
+def _watchlist_count(cursor, watchlist_id: str) -> int:
+    """Count the contracts on a watchlist."""
+    cursor.execute('SELECT COUNT(*) FROM user_watchlist WHERE session_id = ?', (watchlist_id,))
+    return cursor.fetchone()[0]
+
+
 @api_bp.route('/watchlist')
 def api_watchlist():
     """Get current watchlist."""
-    watched_ids = session.get('watchlist', [])
+    cursor = get_db().cursor()
+    watched_ids = get_watched_ids(cursor, session)
     return jsonify({'watchlist': watched_ids, 'count': len(watched_ids)})
 
 
 @api_bp.route('/watchlist/add/<contract_id>', methods=['POST'])
 def add_to_watchlist(contract_id):
     """Add project to watchlist."""
-    watchlist = session.get('watchlist', [])
-    if contract_id not in watchlist:
-        watchlist.append(contract_id)
-        session['watchlist'] = watchlist
-    return jsonify({'success': True, 'count': len(watchlist)})
+    conn = get_db()
+    cursor = conn.cursor()
+    import_session_watchlist(cursor, session)
+    watchlist_id = get_watchlist_token(session, create=True)
+
+    cursor.execute('INSERT OR IGNORE INTO user_watchlist (session_id, contract_id) VALUES (?, ?)',
+                   (watchlist_id, contract_id))
+    commit_db(conn)
+    return _watchlist_ok(_watchlist_count(cursor, watchlist_id))
 
 
 @api_bp.route('/watchlist/remove/<contract_id>', methods=['POST'])
 def remove_from_watchlist(contract_id):
     """Remove project from watchlist."""
-    watchlist = session.get('watchlist', [])
-    if contract_id in watchlist:
-        watchlist.remove(contract_id)
-        session['watchlist'] = watchlist
-    return jsonify({'success': True, 'count': len(watchlist)})
+    conn = get_db()
+    cursor = conn.cursor()
+    watchlist_id = import_session_watchlist(cursor, session)
+    if watchlist_id is None:
+        return _watchlist_ok(0)
+
+    cursor.execute('DELETE FROM user_watchlist WHERE session_id = ? AND contract_id = ?',
+                   (watchlist_id, contract_id))
+    commit_db(conn)
+    return _watchlist_ok(_watchlist_count(cursor, watchlist_id))
 
 
 @api_bp.route('/watchlist/toggle/<contract_id>', methods=['POST'])
 def toggle_watchlist(contract_id):
     """Toggle project in watchlist."""
-    watchlist = session.get('watchlist', [])
-    if contract_id in watchlist:
-        watchlist.remove(contract_id)
-        is_watched = False
-    else:
-        watchlist.append(contract_id)
-        is_watched = True
-    session['watchlist'] = watchlist
-    return jsonify({'success': True, 'is_watched': is_watched, 'count': len(watchlist)})
+    conn = get_db()
+    cursor = conn.cursor()
+    import_session_watchlist(cursor, session)
+    watchlist_id = get_watchlist_token(session, create=True)
+
+    cursor.execute('DELETE FROM user_watchlist WHERE session_id = ? AND contract_id = ?',
+                   (watchlist_id, contract_id))
+    is_watched = cursor.rowcount == 0
+    if is_watched:
+        cursor.execute('INSERT INTO user_watchlist (session_id, contract_id) VALUES (?, ?)',
+                       (watchlist_id, contract_id))
+    commit_db(conn)
+    body = _WATCHLIST_TOGGLED % (b'true' if is_watched else b'false',
+                                 _watchlist_count(cursor, watchlist_id))
+    return Response(body, mimetype='application/json')
 
 
 @api_bp.route('/watchlist/clear', methods=['POST'])
 def clear_watchlist():
     """Clear all items from watchlist."""
-    session['watchlist'] = []
-    return jsonify({'success': True, 'count': 0})
+    session.pop(LEGACY_WATCHLIST_KEY, None)
+    watchlist_id = get_watchlist_token(session)
+    if watchlist_id is not None:
+        conn = get_db()
+        conn.execute('DELETE FROM user_watchlist WHERE session_id = ?', (watchlist_id,))
+        commit_db(conn)
+    return _watchlist_ok(0)
 
 
 # Email Alert API endpoints
+# The email service (smtplib, email.mime) is imported on first use so app
+# startup does not pay for it when alerts are not configured.
 @api_bp.route('/alerts/status')
 def alert_status():
     """Get email alert configuration status."""
+    from app.services.email_alerts import EmailAlertService
     service = EmailAlertService()
     return jsonify({
         'enabled': service.is_enabled(),
@@ -134,11 +230,13 @@ def alert_status():
 @api_bp.route('/alerts/check', methods=['POST'])
 def check_alerts():
     """Manually trigger alert check (for testing/admin use)."""
+    from app.services.email_alerts import check_and_send_alerts
     conn = get_db()
     cursor = conn.cursor()
 
     result = check_and_send_alerts(cursor)
-    conn.commit()
+    commit_db(conn)
+    delete_memoized()
 
     return jsonify(result)
 
@@ -146,6 +244,7 @@ def check_alerts():
 @api_bp.route('/alerts/test', methods=['POST'])
 def test_alert():
     """Send a test alert email."""
+    from app.services.email_alerts import EmailAlertService
     service = EmailAlertService()
 
     if not service.is_enabled():
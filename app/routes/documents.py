@@ -3,7 +3,8 @@ Document routes: Document Library, Meeting Minutes, Annual Report
 """
 
 from flask import Blueprint, render_template, current_app, request, jsonify, send_file, abort
-from app.database import get_db
+from app.database import commit_db, get_db
+from app.responses import json_response
 from app.services.document_manager import (
     save_document, get_document, get_document_file_path,
     get_documents_for_contract, get_all_documents, delete_document,
@@ -12,6 +13,9 @@ from app.services.document_manager import (
 
 documents_bp = Blueprint('documents', __name__)
 
+DOWNLOAD_URL = '/documents/download/'
+VIEW_URL = '/documents/view/'
+
 
 @documents_bp.route('/documents')
 def documents():
@@ -69,8 +73,7 @@ def annual_report():
             SUM(CASE WHEN status = 'Completed' THEN 1 ELSE 0 END) as completed,
             SUM(CASE WHEN status = 'Active' THEN 1 ELSE 0 END) as active,
             AVG(percent_complete) as avg_progress
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        FROM live_contracts
     ''')
     summary = cursor.fetchone()
 
@@ -81,8 +84,7 @@ def annual_report():
             COUNT(*) as count,
             SUM(current_amount) as budget,
             SUM(total_paid) as spent
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        FROM live_contracts
         GROUP BY surtax_category
         ORDER BY budget DESC
     ''')
@@ -125,7 +127,7 @@ def upload_document():
     )
 
     if success:
-        conn.commit()
+        commit_db(conn)
         return jsonify({
             'success': True,
             'message': message,
@@ -186,7 +188,7 @@ def delete_document_route(document_id):
     cursor = conn.cursor()
 
     success = delete_document(cursor, document_id)
-    conn.commit()
+    commit_db(conn)
 
     return jsonify({
         'success': success,
@@ -202,7 +204,7 @@ def documents_for_contract(contract_id):
 
     docs = get_documents_for_contract(cursor, contract_id)
 
-    return jsonify({
+    return json_response({
         'documents': [
             {
                 'document_id': d.document_id,
@@ -213,8 +215,8 @@ def documents_for_contract(contract_id):
                 'file_size_formatted': format_file_size(d.file_size),
                 'mime_type': d.mime_type,
                 'uploaded_at': d.uploaded_at,
-                'download_url': f'/documents/download/{d.document_id}',
-                'view_url': f'/documents/view/{d.document_id}'
+                'download_url': DOWNLOAD_URL + str(d.document_id),
+                'view_url': VIEW_URL + str(d.document_id)
             }
             for d in docs
         ],
@@ -2,49 +2,77 @@
 Financial routes: Vendors, Change Orders, Analytics, Budget Performance
 """
 
+from bisect import bisect_right
+from itertools import groupby, islice
+from operator import itemgetter
+
 from flask import Blueprint, render_template, request
-from app.database import get_db
+from app.database import get_db, has_table, tuple_cursor
+from app.cache import memoize
+from app.services.rollups import rollup_source
+from app.services.stats import get_analytics_breakdown, get_budget_performance
 
 financials_bp = Blueprint('financials', __name__)
 
 
-@financials_bp.route('/vendors')
-def vendors():
-    """Vendor Performance tracking with ratings."""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute('''
+# Category-specific vendor recommendations for the vendor profile tool
+CATEGORY_SPECIALIZATIONS = {
+    'HVAC': ['HVAC certification', 'EPA 608 certification', 'Sheet metal experience'],
+    'Roofing': ['Licensed roofing contractor', 'Manufacturer certifications', 'Storm damage experience'],
+    'Safety & Security': ['Security systems certification', 'Low voltage license', 'Access control experience'],
+    'Technology': ['Network infrastructure', 'Structured cabling', 'AV integration'],
+    'New Construction': ['General contractor license', 'LEED certification', 'School construction experience'],
+    'Renovation': ['Historic preservation (if applicable)', 'Occupied facility experience', 'Phased construction'],
+    'Site Improvements': ['Paving license', 'Drainage/stormwater', 'ADA compliance'],
+}
+DEFAULT_SPECIALIZATIONS = ['General contracting']
+
+# Recommended vendor size and bonding capacity by average category budget.
+# VENDOR_SIZE_TIERS[i] applies below VENDOR_SIZE_THRESHOLDS[i]; the last
+# tier covers everything above the largest threshold.
+VENDOR_SIZE_THRESHOLDS = (100_000, 500_000, 2_000_000)
+VENDOR_SIZE_TIERS = (
+    ('Small to Medium', '$500K - $1M'),
+    ('Medium', '$1M - $5M'),
+    ('Medium to Large', '$5M - $10M'),
+    ('Large', '$10M+'),
+)
+
+
+@memoize()
+def _fetch_vendor_rollup(cursor):
+    """Per-vendor performance rows and summary stats for the vendors page."""
+    source = rollup_source(cursor, 'contract_rollup_vendor')
+
+    cursor.execute(f'''
         SELECT
-            vendor_name,
-            COUNT(*) as project_count,
-            SUM(current_amount) as total_value,
-            AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100 as delay_rate,
-            AVG(CASE WHEN is_over_budget = 1 THEN 1.0 ELSE 0.0 END) * 100 as overbudget_rate,
-            AVG(percent_complete) as avg_completion,
-            AVG(cost_performance_index) as avg_cpi,
-            -- Performance score: 100 - delay_rate - overbudget_rate + (cpi bonus)
-            100 - (AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 50)
-                - (AVG(CASE WHEN is_over_budget = 1 THEN 1.0 ELSE 0.0 END) * 50)
-                + COALESCE((AVG(cost_performance_index) - 1) * 20, 0) as performance_score,
-            GROUP_CONCAT(DISTINCT surtax_category) as categories
-        FROM contracts
-        WHERE is_deleted = 0 AND vendor_name IS NOT NULL AND vendor_name != ''
-        GROUP BY vendor_name
+            vendor_name, project_count, total_value, delay_rate, overbudget_rate,
+            avg_completion, avg_cpi, performance_score, categories
+        FROM {source}
         ORDER BY total_value DESC
     ''')
-    vendors_list = cursor.fetchall()
+    vendors_list = [dict(row) for row in cursor.fetchall()]
 
-    # Summary stats
-    cursor.execute('''
+    # Summary stats, weighted by project like the per-contract averages
+    cursor.execute(f'''
         SELECT
-            COUNT(DISTINCT vendor_name) as total_vendors,
-            AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100 as avg_delay_rate,
-            AVG(CASE WHEN is_over_budget = 1 THEN 1.0 ELSE 0.0 END) * 100 as avg_overbudget_rate
-        FROM contracts
-        WHERE is_deleted = 0 AND vendor_name IS NOT NULL AND vendor_name != ''
+            COUNT(*) as total_vendors,
+            (SUM(delayed_count) * 1.0 / SUM(project_count)) * 100 as avg_delay_rate,
+            (SUM(over_budget_count) * 1.0 / SUM(project_count)) * 100 as avg_overbudget_rate
+        FROM {source}
     ''')
-    summary = cursor.fetchone()
+    summary = dict(cursor.fetchone())
+
+    return vendors_list, summary
+
+
+@financials_bp.route('/vendors')
+def vendors():
+    """Vendor Performance tracking with ratings."""
+    conn = get_db()
+    cursor = conn.cursor()
+
+    vendors_list, summary = _fetch_vendor_rollup(cursor)
 
     return render_template('financials/vendors.html',
                           title='Vendor Performance',
@@ -63,85 +91,58 @@ def vendor_profile_tool():
     budget_range = request.args.get('budget', None)
 
     # Get category performance stats
-    cursor.execute('''
+    cursor.execute(f'''
         SELECT
-            surtax_category,
-            COUNT(*) as project_count,
-            AVG(current_amount) as avg_budget,
-            MIN(current_amount) as min_budget,
-            MAX(current_amount) as max_budget,
-            AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100 as delay_rate,
-            AVG(CASE WHEN is_over_budget = 1 THEN 1.0 ELSE 0.0 END) * 100 as overbudget_rate,
-            AVG(cost_performance_index) as avg_cpi
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
+            surtax_category, project_count, avg_budget, min_budget, max_budget,
+            delay_rate, overbudget_rate, avg_cpi
+        FROM {rollup_source(cursor, 'contract_rollup_category')}
         ORDER BY project_count DESC
     ''')
     category_stats = cursor.fetchall()
 
-    # Get top performing vendors by category
-    cursor.execute('''
+    # Get top performing vendors by category. Plain tuples are cheaper to
+    # group; only the three kept per category are turned into dicts.
+    vendor_cursor = tuple_cursor(conn)
+    vendor_cursor.execute('''
         SELECT
             surtax_category,
             vendor_name,
             COUNT(*) as projects,
             AVG(cost_performance_index) as avg_cpi,
-            AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100 as delay_rate,
+            COALESCE(AVG(is_delayed), 0) * 100 as delay_rate,
             SUM(current_amount) as total_value
-        FROM contracts
-        WHERE is_deleted = 0
-        AND surtax_category IS NOT NULL
-        AND vendor_name IS NOT NULL AND vendor_name != ''
+        FROM live_contracts
+        WHERE vendor_name IS NOT NULL AND vendor_name != ''
         GROUP BY surtax_category, vendor_name
         HAVING COUNT(*) >= 2
         ORDER BY surtax_category, avg_cpi DESC
     ''')
-    vendor_by_category = cursor.fetchall()
+    columns = [d[0] for d in vendor_cursor.description]
+
+    # Rows are ordered by category, so each category's top three are one group
+    top_vendors = {
+        cat_name: [dict(zip(columns, row)) for row in islice(rows, 3)]
+        for cat_name, rows in groupby(vendor_cursor, key=itemgetter(0))
+    }
 
     # Build recommendations by category
     recommendations = {}
-    for cat in category_stats:
-        cat_name = cat['surtax_category']
-        avg_budget = cat['avg_budget'] or 0
-
-        # Determine recommended vendor size based on budget
-        if avg_budget < 100000:
-            size_rec = 'Small to Medium'
-            bonding_rec = '$500K - $1M'
-        elif avg_budget < 500000:
-            size_rec = 'Medium'
-            bonding_rec = '$1M - $5M'
-        elif avg_budget < 2000000:
-            size_rec = 'Medium to Large'
-            bonding_rec = '$5M - $10M'
-        else:
-            size_rec = 'Large'
-            bonding_rec = '$10M+'
-
-        # Category-specific recommendations
-        specializations = {
-            'HVAC': ['HVAC certification', 'EPA 608 certification', 'Sheet metal experience'],
-            'Roofing': ['Licensed roofing contractor', 'Manufacturer certifications', 'Storm damage experience'],
-            'Safety & Security': ['Security systems certification', 'Low voltage license', 'Access control experience'],
-            'Technology': ['Network infrastructure', 'Structured cabling', 'AV integration'],
-            'New Construction': ['General contractor license', 'LEED certification', 'School construction experience'],
-            'Renovation': ['Historic preservation (if applicable)', 'Occupied facility experience', 'Phased construction'],
-            'Site Improvements': ['Paving license', 'Drainage/stormwater', 'ADA compliance'],
-        }
+    for cat_name, _, avg_budget, _, _, delay_rate, overbudget_rate, _ in category_stats:
+        avg_budget = avg_budget or 0
+        size_rec, bonding_rec = VENDOR_SIZE_TIERS[bisect_right(VENDOR_SIZE_THRESHOLDS, avg_budget)]
 
         recommendations[cat_name] = {
             'avg_budget': avg_budget,
             'size_recommendation': size_rec,
             'bonding_recommendation': bonding_rec,
-            'delay_rate': cat['delay_rate'],
-            'overbudget_rate': cat['overbudget_rate'],
-            'specializations': specializations.get(cat_name, ['General contracting']),
-            'top_vendors': [v for v in vendor_by_category if v['surtax_category'] == cat_name][:3]
+            'delay_rate': delay_rate,
+            'overbudget_rate': overbudget_rate,
+            'specializations': CATEGORY_SPECIALIZATIONS.get(cat_name, DEFAULT_SPECIALIZATIONS),
+            'top_vendors': top_vendors.get(cat_name, [])
         }
 
     # Get all categories for dropdown
-    categories = [cat['surtax_category'] for cat in category_stats]
+    categories = [cat[0] for cat in category_stats]
 
     return render_template('financials/vendor_profile.html',
                           title='Ideal Vendor Profile',
@@ -166,10 +167,8 @@ def change_orders():
                 THEN ((current_amount - original_amount) / original_amount * 100)
                 ELSE 0 END as change_pct,
             status
-        FROM contracts
-        WHERE is_deleted = 0
-        AND surtax_category IS NOT NULL
-        AND original_amount IS NOT NULL
+        FROM live_contracts
+        WHERE original_amount IS NOT NULL
         AND current_amount != original_amount
         ORDER BY ABS(current_amount - original_amount) DESC
     ''')
@@ -181,10 +180,8 @@ def change_orders():
             SUM(current_amount - original_amount) as total_change_value,
             SUM(CASE WHEN current_amount > original_amount THEN 1 ELSE 0 END) as increases,
             SUM(CASE WHEN current_amount < original_amount THEN 1 ELSE 0 END) as decreases
-        FROM contracts
-        WHERE is_deleted = 0
-        AND surtax_category IS NOT NULL
-        AND original_amount IS NOT NULL
+        FROM live_contracts
+        WHERE original_amount IS NOT NULL
         AND current_amount != original_amount
     ''')
     stats = cursor.fetchone()
@@ -201,35 +198,9 @@ def analytics():
     conn = get_db()
     cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT
-            surtax_category,
-            COUNT(*) as project_count,
-            COALESCE(SUM(current_amount), 0) as total_budget,
-            COALESCE(SUM(total_paid), 0) as total_spent,
-            AVG(percent_complete) as avg_completion
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
-        ORDER BY total_budget DESC
-    ''')
-    category_data = cursor.fetchall()
-
-    cursor.execute('''
-        SELECT
-            status,
-            COUNT(*) as count,
-            SUM(current_amount) as value
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY status
-    ''')
-    status_data = cursor.fetchall()
-
     return render_template('financials/analytics.html',
                           title='Analytics',
-                          category_data=category_data,
-                          status_data=status_data)
+                          **get_analytics_breakdown(cursor))
 
 
 @financials_bp.route('/budget-performance')
@@ -238,99 +209,59 @@ def budget_performance():
     conn = get_db()
     cursor = conn.cursor()
 
-    # Get projects with budget, progress, and EVA data
-    cursor.execute('''
-        SELECT
-            contract_id, title, school_name, surtax_category,
-            original_amount, current_amount, total_paid,
-            percent_complete,
-            CASE WHEN original_amount > 0
-                THEN (total_paid / original_amount * 100)
-                ELSE 0 END as spend_rate,
-            CASE WHEN current_amount > 0
-                THEN (total_paid / current_amount * 100)
-                ELSE 0 END as budget_utilization,
-            -- Earned Value Analysis fields
-            planned_value, earned_value, actual_cost,
-            cost_variance, cost_performance_index,
-            -- Spending vs Progress indicator
-            CASE
-                WHEN percent_complete > 0 AND current_amount > 0
-                THEN (total_paid / current_amount * 100) - percent_complete
-                ELSE 0
-            END as spend_progress_gap
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        ORDER BY current_amount DESC
-    ''')
-    projects = cursor.fetchall()
+    data = get_budget_performance(cursor)
 
-    # Summary stats with EVA totals
-    cursor.execute('''
-        SELECT
-            COALESCE(SUM(original_amount), 0) as total_original,
-            COALESCE(SUM(current_amount), 0) as total_current,
-            COALESCE(SUM(total_paid), 0) as total_spent,
-            AVG(percent_complete) as avg_progress,
-            -- EVA totals
-            COALESCE(SUM(planned_value), 0) as total_pv,
-            COALESCE(SUM(earned_value), 0) as total_ev,
-            COALESCE(SUM(actual_cost), 0) as total_ac,
-            -- Overall CPI (EV/AC)
-            CASE WHEN SUM(actual_cost) > 0
-                THEN SUM(earned_value) / SUM(actual_cost)
-                ELSE NULL END as portfolio_cpi,
-            -- Count of projects by health
-            SUM(CASE WHEN cost_performance_index >= 1.0 THEN 1 ELSE 0 END) as on_budget_count,
-            SUM(CASE WHEN cost_performance_index < 1.0 AND cost_performance_index >= 0.9 THEN 1 ELSE 0 END) as near_budget_count,
-            SUM(CASE WHEN cost_performance_index < 0.9 AND cost_performance_index IS NOT NULL THEN 1 ELSE 0 END) as over_budget_count
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    summary = cursor.fetchone()
+    return render_template('financials/budget_performance.html',
+                          title='Budget Performance',
+                          **data)
+
+
+# Benchmark metrics whose names contain these are ranked lowest-first
+LOWER_IS_BETTER_MARKERS = ('delay', 'over_budget', 'rate')
 
-    # By surtax category with EVA
-    cursor.execute('''
-        SELECT
-            COALESCE(surtax_category, 'Unclassified') as category,
-            COUNT(*) as count,
-            COALESCE(SUM(current_amount), 0) as budget,
-            COALESCE(SUM(total_paid), 0) as spent,
-            AVG(percent_complete) as avg_progress,
-            AVG(cost_performance_index) as avg_cpi
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
-        ORDER BY budget DESC
-    ''')
-    by_category = cursor.fetchall()
 
-    # Projects with spending outpacing progress (potential concerns)
+@memoize()
+def _fetch_county_benchmarks(cursor):
+    """
+    Latest-year benchmark metrics by county plus per-metric rankings.
+
+    Returns None when the county_benchmarks table has not been created.
+    """
+    if not has_table(cursor, 'county_benchmarks'):
+        return None
+
+    # Get all metrics for comparison, ranked both ways per metric. NULL values
+    # get their own partition so they do not shift the ranks of real values.
+    # Ranks are unique (1..N); tied values rank in county name order.
     cursor.execute('''
         SELECT
-            contract_id, title, school_name,
-            percent_complete,
-            CASE WHEN current_amount > 0
-                THEN (total_paid / current_amount * 100)
-                ELSE 0 END as spend_pct,
-            cost_performance_index
-        FROM contracts
-        WHERE is_deleted = 0
-        AND surtax_category IS NOT NULL
-        AND total_paid > 0
-        AND cost_performance_index IS NOT NULL
-        AND cost_performance_index < 0.9
-        ORDER BY cost_performance_index ASC
-        LIMIT 10
+            county_name, metric_name, metric_value,
+            ROW_NUMBER() OVER (
+                PARTITION BY metric_name, metric_value IS NULL
+                ORDER BY metric_value DESC, county_name
+            ) as rank_high,
+            ROW_NUMBER() OVER (
+                PARTITION BY metric_name, metric_value IS NULL
+                ORDER BY metric_value ASC, county_name
+            ) as rank_low
+        FROM county_benchmarks
+        WHERE fiscal_year = (SELECT MAX(fiscal_year) FROM county_benchmarks)
+        ORDER BY county_name, metric_name
     ''')
-    spending_concerns = cursor.fetchall()
 
-    return render_template('financials/budget_performance.html',
-                          title='Budget Performance',
-                          projects=projects,
-                          summary=summary,
-                          by_category=by_category,
-                          spending_concerns=spending_concerns)
+    # Organize metrics and rankings by county in one pass
+    metrics_by_county = {}
+    rankings = {}
+    for county, metric, value, rank_high, rank_low in cursor.fetchall():
+        metrics_by_county.setdefault(county, {})[metric] = value
+        if value is None:
+            continue
+
+        # Determine if higher or lower is better
+        lower_is_better = any(x in metric.lower() for x in LOWER_IS_BETTER_MARKERS)
+        rankings.setdefault(metric, {})[county] = rank_low if lower_is_better else rank_high
+
+    return metrics_by_county, rankings
 
 
 @financials_bp.route('/county-comparison')
@@ -339,9 +270,8 @@ def county_comparison():
     conn = get_db()
     cursor = conn.cursor()
 
-    # Check if county_benchmarks table exists
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='county_benchmarks'")
-    if not cursor.fetchone():
+    benchmarks = _fetch_county_benchmarks(cursor)
+    if benchmarks is None:
         return render_template('financials/county_comparison.html',
                               title='County Comparison',
                               has_data=False,
@@ -349,50 +279,7 @@ def county_comparison():
                               metrics={},
                               our_county='Marion')
 
-    # Get all counties with data
-    cursor.execute('''
-        SELECT DISTINCT county_name, fips_code, fiscal_year
-        FROM county_benchmarks
-        ORDER BY county_name
-    ''')
-    county_list = cursor.fetchall()
-
-    # Get all metrics for comparison
-    cursor.execute('''
-        SELECT county_name, metric_name, metric_value, metric_unit
-        FROM county_benchmarks
-        WHERE fiscal_year = (SELECT MAX(fiscal_year) FROM county_benchmarks)
-        ORDER BY county_name, metric_name
-    ''')
-    raw_metrics = cursor.fetchall()
-
-    # Organize metrics by county
-    metrics_by_county = {}
-    all_metric_names = set()
-    for row in raw_metrics:
-        county = row['county_name']
-        metric = row['metric_name']
-        value = row['metric_value']
-
-        if county not in metrics_by_county:
-            metrics_by_county[county] = {}
-        metrics_by_county[county][metric] = value
-        all_metric_names.add(metric)
-
-    # Calculate rankings for each metric
-    rankings = {}
-    for metric in all_metric_names:
-        values = [(county, data.get(metric)) for county, data in metrics_by_county.items() if data.get(metric) is not None]
-
-        # Determine if higher or lower is better
-        lower_is_better = any(x in metric.lower() for x in ['delay', 'over_budget', 'rate'])
-
-        if lower_is_better:
-            values.sort(key=lambda x: x[1])  # Lower first = rank 1
-        else:
-            values.sort(key=lambda x: x[1], reverse=True)  # Higher first = rank 1
-
-        rankings[metric] = {county: rank + 1 for rank, (county, _) in enumerate(values)}
+    metrics_by_county, rankings = benchmarks
 
     # Key metrics to highlight
     key_metrics = [
@@ -2,9 +2,12 @@
 Main routes: Overview, Projects, Schools, Ask AI
 """
 
+from functools import lru_cache
+
 from flask import Blueprint, render_template, request, current_app
-from app.database import get_db
-from app.services.stats import get_overview_stats, get_spending_by_category
+from app.database import get_db, iter_rows
+from app.services.rollups import rollup_source
+from app.services.stats import get_overview_stats, get_spending_by_category, get_surtax_categories
 
 main_bp = Blueprint('main', __name__)
 
@@ -18,27 +21,55 @@ def index():
     stats = get_overview_stats(cursor)
     spending = get_spending_by_category(cursor)
 
-    # Get concerns count (delayed + over budget projects)
-    cursor.execute('''
-        SELECT
-            COUNT(CASE WHEN is_delayed = 1 THEN 1 END) +
-            COUNT(CASE WHEN is_over_budget = 1 THEN 1 END) as count
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    concerns_row = cursor.fetchone()
-    concerns_count = concerns_row['count'] if concerns_row else 0
-
     county_config = current_app.config.get('county', {})
 
     return render_template('main/overview.html',
                           title='Overview',
                           stats=stats,
                           spending=spending,
-                          concerns_count=concerns_count,
+                          concerns_count=stats.get('concerns_count', 0),
                           county=county_config)
 
 
+# ORDER BY clauses for the projects listing; unknown sorts leave rows unordered
+PROJECT_SORTS = {
+    'value': ' ORDER BY current_amount DESC',
+    'progress': ' ORDER BY percent_complete DESC',
+    'risk': ' ORDER BY is_delayed DESC, delay_days DESC',
+    'name': ' ORDER BY title ASC',
+}
+
+
+@lru_cache(maxsize=64)
+def _projects_sql(status_filter: bool, category_filter: bool, sort: str) -> str:
+    """
+    Build the projects listing query. The text only depends on which filters
+    are set and the sort, so identical requests reuse the same statement
+    from the connection's prepared statement cache.
+    """
+    query = '''
+        SELECT
+            contract_id, title, school_name, vendor_name, status,
+            surtax_category, current_amount, percent_complete,
+            is_delayed, delay_days, is_over_budget, budget_variance_pct
+        FROM live_contracts
+    '''
+    filters = []
+    if status_filter:
+        filters.append('status = ?')
+    if category_filter:
+        filters.append('surtax_category = ?')
+    if filters:
+        query += ' WHERE ' + ' AND '.join(filters)
+    return query + PROJECT_SORTS.get(sort, '')
+
+
+@lru_cache(maxsize=8)
+def _projects_count_sql(status_filter: bool, category_filter: bool) -> str:
+    """Count query matching _projects_sql() for the same filters."""
+    return f'SELECT COUNT(*) FROM ({_projects_sql(status_filter, category_filter, "")})'
+
+
 @main_bp.route('/projects')
 def projects():
     """Projects listing page."""
@@ -50,50 +81,27 @@ def projects():
     category = request.args.get('category', 'all')
     sort = request.args.get('sort', 'value')
 
-    # Build query
-    query = '''
-        SELECT
-            contract_id, title, school_name, vendor_name, status,
-            surtax_category, current_amount, percent_complete,
-            is_delayed, delay_days, is_over_budget, budget_variance_pct
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    '''
     params = []
-
     if status != 'all':
-        query += ' AND status = ?'
         params.append(status)
-
     if category != 'all':
-        query += ' AND surtax_category = ?'
         params.append(category)
 
-    # Sort options
-    if sort == 'value':
-        query += ' ORDER BY current_amount DESC'
-    elif sort == 'progress':
-        query += ' ORDER BY percent_complete DESC'
-    elif sort == 'risk':
-        query += ' ORDER BY is_delayed DESC, delay_days DESC'
-    elif sort == 'name':
-        query += ' ORDER BY title ASC'
-
-    cursor.execute(query, params)
-    projects_list = cursor.fetchall()
-
-    # Get categories for filter dropdown
-    cursor.execute('''
-        SELECT DISTINCT surtax_category
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        ORDER BY surtax_category
-    ''')
-    categories = [row['surtax_category'] for row in cursor.fetchall()]
+    # Categories for filter dropdown
+    categories = get_surtax_categories(cursor)
+
+    cursor.execute(_projects_count_sql(status != 'all', category != 'all'), params)
+    project_count = cursor.fetchone()[0]
+
+    # Run the listing last so its rows can be streamed into the template.
+    # Only whitelisted sorts reach the cached query builder.
+    cursor.execute(_projects_sql(status != 'all', category != 'all',
+                                 sort if sort in PROJECT_SORTS else ''), params)
 
     return render_template('main/projects.html',
                           title='Projects',
-                          projects=projects_list,
+                          projects=iter_rows(cursor),
+                          project_count=project_count,
                           categories=categories,
                           current_status=status,
                           current_category=category,
@@ -123,24 +131,15 @@ def schools():
     conn = get_db()
     cursor = conn.cursor()
 
-    cursor.execute('''
-        SELECT
-            school_name,
-            COUNT(*) as project_count,
-            COALESCE(SUM(current_amount), 0) as total_value,
-            COALESCE(SUM(total_paid), 0) as total_spent,
-            AVG(percent_complete) as avg_completion,
-            COUNT(CASE WHEN is_delayed = 1 THEN 1 END) as delayed_count
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
-        GROUP BY school_name
+    cursor.execute(f'''
+        SELECT school_name, project_count, total_value, total_spent, avg_completion, delayed_count
+        FROM {rollup_source(cursor, 'contract_rollup_school')}
         ORDER BY total_value DESC
     ''')
-    schools_list = cursor.fetchall()
 
     return render_template('main/schools.html',
                           title='Schools',
-                          schools=schools_list)
+                          schools=iter_rows(cursor))
 
 
 @main_bp.route('/ask')
@@ -2,11 +2,23 @@
 Monitoring routes: Concerns, Watchlist, Risk Dashboard, Audit Trail
 """
 
+from collections import namedtuple
+
 from flask import Blueprint, render_template, request, session
-from app.database import get_db
+from app.database import get_db, iter_rows, tuple_cursor
+from app.services.watchlist import get_watched_ids
 
 monitoring_bp = Blueprint('monitoring', __name__)
 
+# Most projects listed per risk level; the concerns page lists them all
+RISK_LIST_LIMIT = 200
+
+# Project fields listed on the risk dashboard
+RiskProject = namedtuple('RiskProject', [
+    'contract_id', 'title', 'school_name', 'current_amount',
+    'is_delayed', 'delay_days', 'is_over_budget',
+])
+
 
 @monitoring_bp.route('/concerns')
 def concerns():
@@ -21,22 +33,15 @@ def concerns():
             current_amount, percent_complete,
             is_delayed, delay_days, delay_reason,
             is_over_budget, budget_variance_pct
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND (is_delayed = 1 OR is_over_budget = 1)
-        ORDER BY
-            CASE
-                WHEN is_delayed = 1 AND is_over_budget = 1 THEN 1
-                WHEN is_over_budget = 1 THEN 2
-                ELSE 3
-            END,
-            delay_days DESC
+        FROM live_contracts
+        WHERE (is_delayed = 1 OR is_over_budget = 1)
+        -- Delayed and over budget first, then over budget only, then delayed only
+        ORDER BY is_over_budget DESC, is_delayed DESC, delay_days DESC
     ''')
-    concerns_list = cursor.fetchall()
 
     return render_template('monitoring/concerns.html',
                           title='Concerns',
-                          concerns=concerns_list)
+                          concerns=iter_rows(cursor))
 
 
 @monitoring_bp.route('/watchlist')
@@ -45,17 +50,21 @@ def watchlist():
     conn = get_db()
     cursor = conn.cursor()
 
-    # Get watchlisted projects from database
-    cursor.execute('''
-        SELECT
-            contract_id, title, school_name, vendor_name, status,
-            current_amount, percent_complete,
-            is_delayed, delay_days, is_over_budget, budget_variance_pct
-        FROM contracts
-        WHERE is_deleted = 0 AND is_watchlisted = 1
-        ORDER BY is_delayed DESC, is_over_budget DESC
-    ''')
-    watchlist_projects = cursor.fetchall()
+    # Same watchlist as the /api/watchlist endpoints: this browser's
+    # user_watchlist rows (plus any list still held in an old session)
+    watchlist_projects = []
+    watched_ids = get_watched_ids(cursor, session)
+    if watched_ids:
+        cursor.execute(f'''
+            SELECT
+                contract_id, title, school_name, vendor_name, status,
+                current_amount, percent_complete,
+                is_delayed, delay_days, is_over_budget, budget_variance_pct
+            FROM contracts
+            WHERE is_deleted = 0 AND contract_id IN ({', '.join('?' * len(watched_ids))})
+            ORDER BY is_delayed DESC, is_over_budget DESC
+        ''', watched_ids)
+        watchlist_projects = cursor.fetchall()
 
     return render_template('monitoring/watchlist.html',
                           title='Watchlist',
@@ -66,41 +75,47 @@ def watchlist():
 def risk_dashboard():
     """Risk Dashboard - flags high-risk projects."""
     conn = get_db()
-    cursor = conn.cursor()
+    cursor = tuple_cursor(conn)
 
-    # High risk: delayed AND over budget
+    # high = delayed AND over budget, medium = either one, low = neither
     cursor.execute('''
-        SELECT contract_id, title, school_name, current_amount, is_delayed, delay_days, is_over_budget
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND is_delayed = 1 AND is_over_budget = 1
+        SELECT
+            COUNT(CASE WHEN is_delayed = 1 AND is_over_budget = 1 THEN 1 END),
+            COUNT(CASE WHEN is_delayed = 1 OR is_over_budget = 1 THEN 1 END),
+            COUNT(*)
+        FROM live_contracts
     ''')
-    high_risk = cursor.fetchall()
-
-    # Medium risk: delayed OR over budget
+    high_count, flagged_count, total_count = cursor.fetchone()
+    counts = {
+        'high': high_count,
+        'medium': flagged_count - high_count,
+        'low': total_count - flagged_count,
+    }
+
+    # Flagged projects in the concerns index order: every high-risk row comes
+    # before the medium-risk ones, so reading stops once both lists are full
     cursor.execute('''
-        SELECT contract_id, title, school_name, current_amount, is_delayed, delay_days, is_over_budget
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND (is_delayed = 1 OR is_over_budget = 1)
-        AND NOT (is_delayed = 1 AND is_over_budget = 1)
+        SELECT
+            CASE WHEN is_delayed = 1 AND is_over_budget = 1 THEN 'high' ELSE 'medium' END,
+            contract_id, title, school_name, current_amount, is_delayed, delay_days, is_over_budget
+        FROM live_contracts
+        WHERE (is_delayed = 1 OR is_over_budget = 1)
+        ORDER BY is_over_budget DESC, is_delayed DESC, delay_days DESC
     ''')
-    medium_risk = cursor.fetchall()
 
-    # Low risk: neither delayed nor over budget
-    cursor.execute('''
-        SELECT contract_id, title, school_name, current_amount
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND is_delayed = 0 AND is_over_budget = 0
-    ''')
-    low_risk = cursor.fetchall()
+    listed = {'high': [], 'medium': []}
+    for row in cursor:
+        projects = listed[row[0]]
+        if len(projects) < RISK_LIST_LIMIT:
+            projects.append(RiskProject._make(row[1:]))
+        elif row[0] == 'medium':
+            break
 
     return render_template('monitoring/risk_dashboard.html',
                           title='Risk Dashboard',
-                          high_risk=high_risk,
-                          medium_risk=medium_risk,
-                          low_risk=low_risk)
+                          high_risk=listed['high'],
+                          medium_risk=listed['medium'],
+                          risk_counts=counts)
 
 
 @monitoring_bp.route('/audit')
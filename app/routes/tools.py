@@ -5,10 +5,20 @@ Tool routes: Meeting Mode, Compliance, Map View, Public Portal, Alerts, Executiv
 from datetime import datetime
 from flask import Blueprint, render_template, current_app
 from app.database import get_db
-from app.services.stats import get_overview_stats, get_spending_by_category
+from app.cache import cached_view, memoize
+from app.services.rollups import rollup_source
+from app.services.stats import (
+    get_capital_project_counts, get_contract_summary, get_overview_stats, get_spending_by_category,
+)
 
 tools_bp = Blueprint('tools', __name__)
 
+# Alert kind -> (title, message) templates for the alerts page
+ALERT_FORMATS = {
+    'warning': ('Project Delayed: {}', '{} days behind schedule'),
+    'danger': ('Over Budget: {}', '{:.1f}% over budget'),
+}
+
 
 @tools_bp.route('/meeting')
 def meeting_mode():
@@ -22,35 +32,13 @@ def executive_view():
     conn = get_db()
     cursor = conn.cursor()
 
-    # Get comprehensive stats
+    # Overview stats and the school/vendor counts share one summary row
     stats = get_overview_stats(cursor)
-    spending = get_spending_by_category(cursor)
-
-    # Additional metrics for executive view
-    cursor.execute('''
-        SELECT
-            COUNT(CASE WHEN status = 'Active' THEN 1 END) as active_projects,
-            COUNT(CASE WHEN status = 'Completed' THEN 1 END) as completed_projects
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    status_counts = cursor.fetchone()
+    summary = get_contract_summary(cursor)
+    school_count = summary.get('school_count') or 0
+    vendor_count = summary.get('vendor_count') or 0
 
-    # School count
-    cursor.execute('''
-        SELECT COUNT(DISTINCT school_name)
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
-    ''')
-    school_count = cursor.fetchone()[0] or 0
-
-    # Vendor count
-    cursor.execute('''
-        SELECT COUNT(DISTINCT vendor_name)
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND vendor_name IS NOT NULL
-    ''')
-    vendor_count = cursor.fetchone()[0] or 0
+    spending = get_spending_by_category(cursor)
 
     # Calculate percentages
     total_budget = stats.get('total_budget') or 1
@@ -62,7 +50,7 @@ def executive_view():
 
     return render_template('tools/executive_view.html',
                           title='Executive View',
-                          stats={**stats, **dict(status_counts)},
+                          stats=stats,
                           spending=spending,
                           school_count=school_count,
                           vendor_count=vendor_count,
@@ -78,43 +66,31 @@ def compliance_dashboard():
     conn = get_db()
     cursor = conn.cursor()
 
+    summary = get_contract_summary(cursor)
+
     # Budget compliance
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total,
-            SUM(CASE WHEN is_over_budget = 1 THEN 1 ELSE 0 END) as over_budget,
-            AVG(budget_variance_pct) as avg_variance
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    budget_compliance = cursor.fetchone()
+    budget_compliance = {
+        'total': summary.get('total_projects', 0),
+        'over_budget': summary.get('over_budget_projects', 0),
+        'avg_variance': summary.get('avg_variance'),
+    }
 
     # Schedule compliance
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total,
-            SUM(CASE WHEN is_delayed = 1 THEN 1 ELSE 0 END) as delayed,
-            AVG(CASE WHEN is_delayed = 1 THEN delay_days ELSE 0 END) as avg_delay
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    schedule_compliance = cursor.fetchone()
+    schedule_compliance = {
+        'total': summary.get('total_projects', 0),
+        'delayed': summary.get('delayed_projects', 0),
+        'avg_delay': summary.get('avg_delay'),
+    }
 
     # By surtax category for compliance tracking
-    cursor.execute('''
-        SELECT
-            COALESCE(surtax_category, 'Unclassified') as category,
-            COUNT(*) as count,
-            SUM(current_amount) as total
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
+    cursor.execute(f'''
+        SELECT surtax_category as category, project_count as count, total_budget as total
+        FROM {rollup_source(cursor, 'contract_rollup_category')}
     ''')
     category_breakdown = cursor.fetchall()
 
     # Count by category type for the summary cards
-    capital_count = sum(c['count'] for c in category_breakdown if c['category'] in ['New Construction', 'Renovation', 'Safety/Security', 'Technology', 'Site Improvements'])
-    total_count = sum(c['count'] for c in category_breakdown)
+    capital_count, total_count = get_capital_project_counts(cursor)
     capital_pct = (capital_count / total_count * 100) if total_count > 0 else 0
 
     return render_template('tools/compliance.html',
@@ -129,6 +105,7 @@ def compliance_dashboard():
 
 
 @tools_bp.route('/map')
+@cached_view()
 def map_view():
     """Geographic map view of projects."""
     conn = get_db()
@@ -139,8 +116,8 @@ def map_view():
             school_name,
             COUNT(*) as project_count,
             SUM(current_amount) as total_value
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
+        FROM live_contracts
+        WHERE school_name IS NOT NULL
         GROUP BY school_name
         ORDER BY total_value DESC
     ''')
@@ -151,41 +128,36 @@ def map_view():
                           schools=schools)
 
 
-@tools_bp.route('/public')
-def public_portal():
-    """Public transparency portal."""
-    conn = get_db()
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total_projects,
-            SUM(current_amount) as total_budget,
-            SUM(total_paid) as total_spent,
-            SUM(CASE WHEN status = 'Completed' THEN 1 ELSE 0 END) as completed
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    summary = cursor.fetchone()
-
+@memoize()
+def _fetch_recently_completed(cursor):
+    """The ten most recently finished projects shown on the public portal."""
     cursor.execute('''
         SELECT title, school_name, current_amount, surtax_category
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND status = 'Completed'
+        FROM live_contracts
+        WHERE status = 'Completed'
         ORDER BY current_end_date DESC
         LIMIT 10
     ''')
-    completed = cursor.fetchall()
+    return cursor.fetchall()
+
 
-    county_config = current_app.config.get('county', {})
-    surtax_config = current_app.config.get('surtax', {})
+@tools_bp.route('/public')
+@cached_view()
+def public_portal():
+    """Public transparency portal."""
+    conn = get_db()
+    cursor = conn.cursor()
+
+    # Both are memoized; public figures don't need to be fresher than that
+    summary = get_contract_summary(cursor)
+    completed = _fetch_recently_completed(cursor)
 
     return render_template('tools/public_portal.html',
                           title='Public Portal',
                           summary=summary,
                           completed=completed,
-                          county=county_config,
-                          surtax=surtax_config)
+                          county=current_app.config.get('county', {}),
+                          surtax=current_app.config.get('surtax', {}))
 
 
 @tools_bp.route('/alerts')
@@ -194,39 +166,37 @@ def alerts():
     conn = get_db()
     cursor = conn.cursor()
 
-    alerts_list = []
-
-    # Delayed projects
-    cursor.execute('''
-        SELECT contract_id, title, delay_days
-        FROM contracts
-        WHERE is_deleted = 0 AND is_delayed = 1
-        ORDER BY delay_days DESC
-        LIMIT 5
-    ''')
-    for row in cursor.fetchall():
-        alerts_list.append({
-            'type': 'warning',
-            'title': f"Project Delayed: {row['title'][:40]}",
-            'message': f"{row['delay_days']} days behind schedule",
-            'project_id': row['contract_id']
-        })
-
-    # Over budget projects
+    # Five most delayed and five most over-budget projects in one statement,
+    # delayed rows first; UNION ALL alone does not guarantee that order
     cursor.execute('''
-        SELECT contract_id, title, budget_variance_pct
-        FROM contracts
-        WHERE is_deleted = 0 AND is_over_budget = 1
-        ORDER BY budget_variance_pct DESC
-        LIMIT 5
+        SELECT * FROM (
+            SELECT * FROM (
+                SELECT 'warning' as kind, contract_id, substr(title, 1, 40) as title, delay_days as metric
+                FROM contracts
+                WHERE is_deleted = 0 AND is_delayed = 1
+                ORDER BY delay_days DESC
+                LIMIT 5
+            )
+            UNION ALL
+            SELECT * FROM (
+                SELECT 'danger' as kind, contract_id, substr(title, 1, 40) as title, budget_variance_pct as metric
+                FROM contracts
+                WHERE is_deleted = 0 AND is_over_budget = 1
+                ORDER BY budget_variance_pct DESC
+                LIMIT 5
+            )
+        )
+        ORDER BY kind = 'danger', metric DESC
     ''')
-    for row in cursor.fetchall():
-        alerts_list.append({
-            'type': 'danger',
-            'title': f"Over Budget: {row['title'][:40]}",
-            'message': f"{row['budget_variance_pct']:.1f}% over budget",
-            'project_id': row['contract_id']
-        })
+    alerts_list = [
+        {
+            'type': kind,
+            'title': ALERT_FORMATS[kind][0].format(title),
+            'message': ALERT_FORMATS[kind][1].format(metric),
+            'project_id': contract_id
+        }
+        for kind, contract_id, title, metric in cursor.fetchall()
+    ]
 
     return render_template('tools/alerts.html',
                           title='Alerts & Notifications',
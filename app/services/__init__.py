@@ -10,4 +10,5 @@ This module contains reusable business logic separated from routes:
 - school_mapping: School name extraction and mapping
 - email_alerts: Email notification service for delays/budget issues
 - document_manager: File upload and document management
+- watchlist: Per-browser watchlist storage
 """
@@ -12,15 +12,25 @@ Style Guide (Executive Persona):
 7. Note data caveats when relevant
 """
 
+import heapq
+import re
 import sqlite3
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
+from app.cache import memoize
+from app.services.rollups import rollup_source
+from app.services.stats import get_contract_summary
+
 
 def process_question(question: str, cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """
     Process a natural language question about surtax data.
 
+    Answers that depend only on the data are memoized, so repeated quick
+    question chips are served without querying; callers must not modify
+    the returned dict.
+
     Args:
         question: The user's question
         cursor: Database cursor
@@ -36,62 +46,35 @@ def process_question(question: str, cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """
     question_lower = question.lower()
 
-    # Route to appropriate handler based on keywords
-    # Risk/Warning questions (red chips)
-    if any(kw in question_lower for kw in ['schedule risk', 'behind schedule', 'delayed', '30 days']):
-        return _handle_schedule_risks(cursor)
-
-    elif any(kw in question_lower for kw in ['over budget', 'budget alert', 'cost overrun']):
-        return _handle_over_budget_alerts(cursor)
-
-    elif any(kw in question_lower for kw in ['vendor red flag', 'change order', 'vendor problem', 'struggling']):
-        return _handle_vendor_red_flags(cursor)
-
-    elif any(kw in question_lower for kw in ['worried', 'concern', 'risk', 'problem']):
-        return _handle_concerns(cursor)
-
-    # Financial questions (blue/green chips)
-    elif any(kw in question_lower for kw in ['remaining', 'left to spend', 'unspent']):
-        return _handle_remaining_budget(cursor)
-
-    elif any(kw in question_lower for kw in ['largest', 'biggest', 'top 5', 'top five']):
-        return _handle_largest_projects(cursor)
-
-    elif any(kw in question_lower for kw in ['total', 'summary', 'where we stand', 'spent vs budget']):
-        return _handle_budget_summary(cursor)
-
-    # Category/Analysis questions (purple/gray chips)
-    elif any(kw in question_lower for kw in ['top vendor', 'highest contract', 'biggest vendor']):
-        return _handle_top_vendor(cursor)
-
-    elif any(kw in question_lower for kw in ['school', 'most project']):
-        return _handle_schools_by_projects(cursor)
-
-    elif any(kw in question_lower for kw in ['category', 'split', 'construction', 'renovation']):
-        return _handle_category_split(cursor)
-
-    elif any(kw in question_lower for kw in ['completing', 'next 90', 'upcoming']):
-        return _handle_upcoming_completions(cursor)
+    handler = _route_question(question_lower)
+    if handler is None:
+        return _handle_general_query(cursor, question_lower)
+    return handler(cursor)
 
-    # Vendor queries
-    elif any(kw in question_lower for kw in ['vendor', 'contractor', 'company']):
-        return _handle_vendor_query(cursor)
 
-    # Specific project queries
-    elif any(kw in question_lower for kw in ['high school', 'south marion', 'ccc']):
-        return _handle_specific_project(cursor, question_lower)
+def _route_question(question_lower: str):
+    """
+    Return the handler of the highest-priority route with a keyword
+    anywhere in the question, or None if no keyword matches.
+    """
+    best = None
+    for match in _KEYWORD_PATTERN.finditer(question_lower):
+        priority = _KEYWORD_PRIORITY[match.group(1)]
+        if best is None or priority < best:
+            best = priority
+            if best == 0:
+                break
 
-    else:
-        return _handle_general_query(cursor, question_lower)
+    return QUESTION_ROUTES[best][0] if best is not None else None
 
 
+@memoize()
 def _handle_schedule_risks(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about schedule risks and delayed projects."""
     cursor.execute('''
         SELECT title, school_name, delay_days, vendor_name, current_amount
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND is_delayed = 1 AND delay_days > 30
+        FROM live_contracts
+        WHERE is_delayed = 1 AND delay_days > 30
         ORDER BY delay_days DESC
         LIMIT 5
     ''')
@@ -118,14 +101,15 @@ def _handle_schedule_risks(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     }
 
 
+@memoize()
 def _handle_over_budget_alerts(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about over-budget projects."""
     cursor.execute('''
         SELECT title, school_name, budget_variance_pct,
                (current_amount - original_amount) as over_amount,
                vendor_name, current_amount
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND is_over_budget = 1
+        FROM live_contracts
+        WHERE is_over_budget = 1
         ORDER BY budget_variance_pct DESC
         LIMIT 5
     ''')
@@ -153,22 +137,34 @@ def _handle_over_budget_alerts(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     }
 
 
-def _handle_vendor_red_flags(cursor: sqlite3.Cursor) -> Dict[str, Any]:
-    """Handle questions about vendor red flags."""
+# Vendor fields returned in the red flags answer's data
+RED_FLAG_FIELDS = ('vendor_name', 'project_count', 'delayed_count', 'over_budget_count', 'total_value')
+
+
+@memoize()
+def _fetch_vendor_totals(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Per-vendor totals shared by the vendor questions, largest contract value first."""
     cursor.execute('''
         SELECT vendor_name,
                COUNT(*) as project_count,
-               SUM(CASE WHEN is_delayed = 1 THEN 1 ELSE 0 END) as delayed_count,
-               SUM(CASE WHEN is_over_budget = 1 THEN 1 ELSE 0 END) as over_budget_count,
-               SUM(current_amount) as total_value
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND vendor_name IS NOT NULL
+               SUM(current_amount) as total_value,
+               COALESCE(SUM(is_delayed), 0) as delayed_count,
+               COALESCE(SUM(is_over_budget), 0) as over_budget_count,
+               AVG(percent_complete) as avg_progress
+        FROM live_contracts
+        WHERE vendor_name IS NOT NULL
         GROUP BY vendor_name
-        HAVING delayed_count > 0 OR over_budget_count > 0
-        ORDER BY (delayed_count + over_budget_count) DESC
-        LIMIT 5
+        ORDER BY total_value DESC
     ''')
-    rows = cursor.fetchall()
+    return [dict(row) for row in cursor.fetchall()]
+
+
+@memoize()
+def _handle_vendor_red_flags(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+    """Handle questions about vendor red flags."""
+    flagged = [v for v in _fetch_vendor_totals(cursor)
+               if v['delayed_count'] > 0 or v['over_budget_count'] > 0]
+    rows = heapq.nlargest(5, flagged, key=lambda v: v['delayed_count'] + v['over_budget_count'])
 
     if rows:
         lines = []
@@ -182,7 +178,7 @@ def _handle_vendor_red_flags(cursor: sqlite3.Cursor) -> Dict[str, Any]:
 
         return {
             'answer': f"**{len(rows)} vendors** have performance issues:\n\n" + "\n".join(lines),
-            'data': [dict(row) for row in rows],
+            'data': [{key: row[key] for key in RED_FLAG_FIELDS} for row in rows],
             'suggestions': ['Show vendor details', 'Which projects are affected?', 'Vendor performance history'],
             'ask_staff': True,
             'next_step': 'Schedule performance review meetings with flagged vendors'
@@ -194,29 +190,26 @@ def _handle_vendor_red_flags(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     }
 
 
+@memoize()
 def _handle_concerns(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle general concerns/worry questions."""
-    # Get delayed projects
-    cursor.execute('''
-        SELECT COUNT(*) as count, SUM(current_amount) as value
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND is_delayed = 1
-    ''')
-    delayed = cursor.fetchone()
-
-    # Get over budget projects
+    # Delayed and over-budget totals in one pass
     cursor.execute('''
-        SELECT COUNT(*) as count, SUM(current_amount - original_amount) as overage
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND is_over_budget = 1
+        SELECT
+            COUNT(CASE WHEN is_delayed = 1 THEN 1 END) as delayed_count,
+            SUM(CASE WHEN is_delayed = 1 THEN current_amount END) as delayed_value,
+            COUNT(CASE WHEN is_over_budget = 1 THEN 1 END) as over_budget_count,
+            SUM(CASE WHEN is_over_budget = 1 THEN current_amount - original_amount END) as overage
+        FROM live_contracts
+        WHERE is_delayed = 1 OR is_over_budget = 1
     ''')
-    over_budget = cursor.fetchone()
+    row = cursor.fetchone()
 
     issues = []
-    if delayed['count'] > 0:
-        issues.append(f"- **{delayed['count']} delayed projects** worth ${delayed['value']:,.0f}")
-    if over_budget['count'] > 0:
-        issues.append(f"- **{over_budget['count']} over budget** by ${over_budget['overage'] or 0:,.0f} combined")
+    if row['delayed_count'] > 0:
+        issues.append(f"- **{row['delayed_count']} delayed projects** worth ${row['delayed_value']:,.0f}")
+    if row['over_budget_count'] > 0:
+        issues.append(f"- **{row['over_budget_count']} over budget** by ${row['overage'] or 0:,.0f} combined")
 
     if issues:
         return {
@@ -232,16 +225,10 @@ def _handle_concerns(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     }
 
 
+@memoize()
 def _handle_remaining_budget(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about remaining/unspent budget."""
-    cursor.execute('''
-        SELECT
-            SUM(current_amount) as total_budget,
-            SUM(total_paid) as total_spent
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    row = cursor.fetchone()
+    row = get_contract_summary(cursor)
 
     if row and row['total_budget']:
         remaining = row['total_budget'] - (row['total_spent'] or 0)
@@ -259,12 +246,12 @@ def _handle_remaining_budget(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return {'answer': "Unable to calculate remaining budget.", 'suggestions': ['Show all projects']}
 
 
+@memoize()
 def _handle_largest_projects(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about largest projects."""
     cursor.execute('''
         SELECT title, school_name, current_amount, vendor_name, status, percent_complete
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        FROM live_contracts
         ORDER BY current_amount DESC
         LIMIT 5
     ''')
@@ -286,21 +273,10 @@ def _handle_largest_projects(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return {'answer': "No projects found.", 'suggestions': ['Show all projects']}
 
 
+@memoize()
 def _handle_budget_summary(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle budget summary questions."""
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total_projects,
-            COUNT(CASE WHEN status = 'Active' THEN 1 END) as active,
-            COUNT(CASE WHEN status = 'Completed' THEN 1 END) as completed,
-            SUM(current_amount) as total_budget,
-            SUM(total_paid) as total_spent,
-            COUNT(CASE WHEN is_delayed = 1 THEN 1 END) as delayed,
-            COUNT(CASE WHEN is_over_budget = 1 THEN 1 END) as over_budget
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
-    row = cursor.fetchone()
+    row = get_contract_summary(cursor)
 
     if row:
         spent_pct = (row['total_spent'] or 0) / row['total_budget'] * 100 if row['total_budget'] else 0
@@ -309,29 +285,19 @@ def _handle_budget_summary(cursor: sqlite3.Cursor) -> Dict[str, Any]:
             'answer': f"**Surtax Program Summary**\n\n"
                      f"- **${row['total_budget']:,.0f}** total budget across **{row['total_projects']}** projects\n"
                      f"- **${row['total_spent'] or 0:,.0f}** spent ({spent_pct:.1f}%)\n"
-                     f"- **{row['active']}** active, **{row['completed']}** completed\n"
-                     f"- **{row['delayed']}** delayed, **{row['over_budget']}** over budget",
+                     f"- **{row['active_projects']}** active, **{row['completed_projects']}** completed\n"
+                     f"- **{row['delayed_projects']}** delayed, **{row['over_budget_projects']}** over budget",
             'suggestions': ['Show delayed projects', 'Show over budget', 'Spending by category']
         }
 
     return {'answer': "No budget data available.", 'suggestions': ['Show all projects']}
 
 
+@memoize()
 def _handle_top_vendor(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about top vendor."""
-    cursor.execute('''
-        SELECT vendor_name,
-               COUNT(*) as project_count,
-               SUM(current_amount) as total_value,
-               SUM(CASE WHEN is_delayed = 1 THEN 1 ELSE 0 END) as delayed_count,
-               AVG(percent_complete) as avg_progress
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND vendor_name IS NOT NULL
-        GROUP BY vendor_name
-        ORDER BY total_value DESC
-        LIMIT 1
-    ''')
-    row = cursor.fetchone()
+    vendors = _fetch_vendor_totals(cursor)
+    row = vendors[0] if vendors else None
 
     if row:
         status = "on track" if row['delayed_count'] == 0 else f"with {row['delayed_count']} delayed"
@@ -346,15 +312,12 @@ def _handle_top_vendor(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return {'answer': "No vendor data available.", 'suggestions': ['Show all projects']}
 
 
+@memoize()
 def _handle_schools_by_projects(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about schools by project count."""
-    cursor.execute('''
-        SELECT school_name,
-               COUNT(*) as project_count,
-               SUM(current_amount) as total_value
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
-        GROUP BY school_name
+    cursor.execute(f'''
+        SELECT school_name, project_count, total_value
+        FROM {rollup_source(cursor, 'contract_rollup_school')}
         ORDER BY project_count DESC
         LIMIT 5
     ''')
@@ -371,15 +334,12 @@ def _handle_schools_by_projects(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return {'answer': "No school data available.", 'suggestions': ['Show all projects']}
 
 
+@memoize()
 def _handle_category_split(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about category/type split."""
-    cursor.execute('''
-        SELECT surtax_category,
-               COUNT(*) as count,
-               SUM(current_amount) as total
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
+    cursor.execute(f'''
+        SELECT surtax_category, project_count as count, total_budget as total
+        FROM {rollup_source(cursor, 'contract_rollup_category')}
         ORDER BY total DESC
     ''')
     rows = cursor.fetchall()
@@ -400,6 +360,7 @@ def _handle_category_split(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return {'answer': "No category data available.", 'suggestions': ['Show all projects']}
 
 
+@memoize()
 def _handle_upcoming_completions(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle questions about upcoming completions."""
     today = datetime.now()
@@ -407,9 +368,8 @@ def _handle_upcoming_completions(cursor: sqlite3.Cursor) -> Dict[str, Any]:
 
     cursor.execute('''
         SELECT title, school_name, current_end_date, percent_complete, current_amount
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND status = 'Active'
+        FROM live_contracts
+        WHERE status = 'Active'
         AND current_end_date IS NOT NULL
         AND current_end_date <= ?
         AND current_end_date >= ?
@@ -437,40 +397,40 @@ def _handle_upcoming_completions(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     }
 
 
+@memoize()
 def _handle_vendor_query(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """Handle general vendor questions."""
-    cursor.execute('''
-        SELECT vendor_name,
-               COUNT(*) as projects,
-               SUM(current_amount) as total,
-               SUM(CASE WHEN is_delayed = 1 THEN 1 ELSE 0 END) as delayed
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND vendor_name IS NOT NULL
-        GROUP BY vendor_name
-        ORDER BY total DESC
-        LIMIT 5
-    ''')
-    rows = cursor.fetchall()
+    rows = _fetch_vendor_totals(cursor)[:5]
 
     if rows:
         lines = []
         for row in rows:
-            status = f" ({row['delayed']} delayed)" if row['delayed'] > 0 else ""
-            lines.append(f"- **{row['vendor_name']}**: ${row['total']:,.0f} ({row['projects']} projects){status}")
+            status = f" ({row['delayed_count']} delayed)" if row['delayed_count'] > 0 else ""
+            lines.append(f"- **{row['vendor_name']}**: ${row['total_value']:,.0f} ({row['project_count']} projects){status}")
 
         return {
             'answer': "**Top Vendors by Contract Value:**\n\n" + "\n".join(lines),
-            'data': [dict(row) for row in rows],
+            'data': [{'vendor_name': row['vendor_name'], 'projects': row['project_count'],
+                      'total': row['total_value'], 'delayed': row['delayed_count']}
+                     for row in rows],
             'suggestions': ['Vendor red flags', 'Vendor performance', 'Show all vendors']
         }
 
     return {'answer': "No vendor data available.", 'suggestions': ['Show all projects']}
 
 
-def _handle_specific_project(cursor: sqlite3.Cursor, question: str) -> Dict[str, Any]:
-    """Handle questions about specific projects."""
+@memoize()
+def _handle_specific_project(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+    """
+    Handle questions about specific projects. The lookup does not depend on
+    the wording of the question, so the answer is memoized like the others.
+    """
     cursor.execute('''
-        SELECT * FROM contracts
+        SELECT
+            contract_id, title, school_name, vendor_name, status,
+            current_amount, percent_complete,
+            is_delayed, delay_days, is_over_budget, budget_variance_pct
+        FROM contracts
         WHERE is_deleted = 0
         AND (title LIKE '%High School%' OR title LIKE '%South Marion%' OR title LIKE '%CCC%')
         LIMIT 1
@@ -498,14 +458,55 @@ def _handle_specific_project(cursor: sqlite3.Cursor, question: str) -> Dict[str,
     return {'answer': "Project not found.", 'suggestions': ['Show all projects', 'Search by school']}
 
 
+# Fixed reply to questions no route matches
+GENERAL_ANSWER: Dict[str, Any] = {
+    'answer': "I can answer questions like:\n\n"
+             "- **Budget**: \"How much is left to spend?\" \"Total budget?\"\n"
+             "- **Risks**: \"What projects are delayed?\" \"Any over budget?\"\n"
+             "- **Vendors**: \"Who are our top vendors?\" \"Any vendor issues?\"\n"
+             "- **Projects**: \"Top 5 largest projects\" \"Upcoming completions\"\n\n"
+             "Try clicking one of the quick question chips above!",
+    'suggestions': ['Budget summary', 'Schedule risks', 'Vendor red flags']
+}
+
+
 def _handle_general_query(cursor: sqlite3.Cursor, question: str) -> Dict[str, Any]:
     """Handle general/unrecognized questions."""
-    return {
-        'answer': "I can answer questions like:\n\n"
-                 "- **Budget**: \"How much is left to spend?\" \"Total budget?\"\n"
-                 "- **Risks**: \"What projects are delayed?\" \"Any over budget?\"\n"
-                 "- **Vendors**: \"Who are our top vendors?\" \"Any vendor issues?\"\n"
-                 "- **Projects**: \"Top 5 largest projects\" \"Upcoming completions\"\n\n"
-                 "Try clicking one of the quick question chips above!",
-        'suggestions': ['Budget summary', 'Schedule risks', 'Vendor red flags']
-    }
+    return GENERAL_ANSWER
+
+
+# Keyword routes in priority order: the first route with a keyword anywhere
+# in the question handles it
+QUESTION_ROUTES = (
+    # Risk/Warning questions (red chips)
+    (_handle_schedule_risks, ('schedule risk', 'behind schedule', 'delayed', '30 days')),
+    (_handle_over_budget_alerts, ('over budget', 'budget alert', 'cost overrun')),
+    (_handle_vendor_red_flags, ('vendor red flag', 'change order', 'vendor problem', 'struggling')),
+    (_handle_concerns, ('worried', 'concern', 'risk', 'problem')),
+    # Financial questions (blue/green chips)
+    (_handle_remaining_budget, ('remaining', 'left to spend', 'unspent')),
+    (_handle_largest_projects, ('largest', 'biggest', 'top 5', 'top five')),
+    (_handle_budget_summary, ('total', 'summary', 'where we stand', 'spent vs budget')),
+    # Category/Analysis questions (purple/gray chips)
+    (_handle_top_vendor, ('top vendor', 'highest contract', 'biggest vendor')),
+    (_handle_schools_by_projects, ('school', 'most project')),
+    (_handle_category_split, ('category', 'split', 'construction', 'renovation')),
+    (_handle_upcoming_completions, ('completing', 'next 90', 'upcoming')),
+    # Vendor queries
+    (_handle_vendor_query, ('vendor', 'contractor', 'company')),
+    # Specific project queries
+    (_handle_specific_project, ('high school', 'south marion', 'ccc')),
+)
+
+# Keyword -> index of the first route it belongs to
+_KEYWORD_PRIORITY: Dict[str, int] = {}
+for _priority, (_handler, _keywords) in enumerate(QUESTION_ROUTES):
+    for _keyword in _keywords:
+        _KEYWORD_PRIORITY.setdefault(_keyword, _priority)
+
+# Every keyword in one pattern, highest priority first. The lookahead tries
+# each position of the question, so overlapping keywords are all seen, and
+# the alternation yields the highest-priority keyword starting there.
+_KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(kw) for kw in _KEYWORD_PRIORITY) + '))'
+)
@@ -18,23 +18,33 @@ import sqlite3
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
+from app.cache import memoize
 
+
+@memoize()
 def get_ai_insights(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
     """
     Generate AI-powered insights from project data.
 
+    Memoized with the other dashboard aggregates; callers must not modify
+    the returned list.
+
     Returns:
         List of insight dictionaries with type, title, description, severity
     """
+    # The budget/spending and per-category insights share one query each
+    portfolio = _fetch_portfolio_totals(cursor)
+    categories = _fetch_category_totals(cursor)
+
     insights = []
 
     # Insight 1: Budget trend analysis
-    budget_insight = _analyze_budget_trends(cursor)
+    budget_insight = _analyze_budget_trends(portfolio)
     if budget_insight:
         insights.append(budget_insight)
 
     # Insight 2: Delay patterns
-    delay_insight = _analyze_delay_patterns(cursor)
+    delay_insight = _analyze_delay_patterns(categories)
     if delay_insight:
         insights.append(delay_insight)
 
@@ -44,33 +54,55 @@ def get_ai_insights(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
         insights.append(vendor_insight)
 
     # Insight 4: Category efficiency
-    category_insight = _analyze_category_efficiency(cursor)
+    category_insight = _analyze_category_efficiency(categories)
     if category_insight:
         insights.append(category_insight)
 
     # Insight 5: Spending rate vs progress
-    efficiency_insight = _analyze_spending_efficiency(cursor)
+    efficiency_insight = _analyze_spending_efficiency(portfolio)
     if efficiency_insight:
         insights.append(efficiency_insight)
 
     return insights
 
 
-def _analyze_budget_trends(cursor: sqlite3.Cursor) -> Dict[str, Any]:
-    """Analyze budget change trends."""
+def _fetch_portfolio_totals(cursor: sqlite3.Cursor) -> sqlite3.Row:
+    """Budget-change totals and active-project spending in one pass."""
     cursor.execute('''
         SELECT
-            COUNT(*) as total,
-            SUM(CASE WHEN current_amount > original_amount THEN 1 ELSE 0 END) as increased,
+            -- Projects with an original budget to compare against
+            COUNT(CASE WHEN original_amount > 0 THEN 1 END) as total,
+            SUM(CASE WHEN original_amount > 0 AND current_amount > original_amount THEN 1 ELSE 0 END) as increased,
             AVG(CASE WHEN original_amount > 0
-                THEN ((current_amount - original_amount) / original_amount * 100)
-                ELSE 0 END) as avg_change
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND original_amount IS NOT NULL AND original_amount > 0
+                THEN ((current_amount - original_amount) / original_amount * 100) END) as avg_change,
+            -- Active projects
+            SUM(CASE WHEN status = 'Active' THEN current_amount END) as budget,
+            SUM(CASE WHEN status = 'Active' THEN amount_paid END) as spent,
+            AVG(CASE WHEN status = 'Active' THEN percent_complete END) as progress
+        FROM live_contracts
     ''')
-    row = cursor.fetchone()
+    return cursor.fetchone()
+
+
+def _fetch_category_totals(cursor: sqlite3.Cursor) -> List[sqlite3.Row]:
+    """Per-category delay and spending totals."""
+    cursor.execute('''
+        SELECT
+            surtax_category,
+            COUNT(*) as total,
+            COALESCE(SUM(is_delayed), 0) as delayed,
+            AVG(CASE WHEN is_delayed = 1 THEN delay_days ELSE 0 END) as avg_delay,
+            SUM(current_amount) as budget,
+            SUM(amount_paid) as spent,
+            AVG(percent_complete) as progress
+        FROM live_contracts
+        GROUP BY surtax_category
+    ''')
+    return cursor.fetchall()
 
+
+def _analyze_budget_trends(row: sqlite3.Row) -> Dict[str, Any]:
+    """Analyze budget change trends."""
     if row and row['total'] > 0:
         pct_increased = (row['increased'] / row['total']) * 100
         avg_change = row['avg_change'] or 0
@@ -89,22 +121,11 @@ def _analyze_budget_trends(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return None
 
 
-def _analyze_delay_patterns(cursor: sqlite3.Cursor) -> Dict[str, Any]:
-    """Analyze delay patterns by category or vendor."""
-    cursor.execute('''
-        SELECT
-            surtax_category,
-            COUNT(*) as total,
-            SUM(CASE WHEN is_delayed = 1 THEN 1 ELSE 0 END) as delayed,
-            AVG(CASE WHEN is_delayed = 1 THEN delay_days ELSE 0 END) as avg_delay
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
-        HAVING total >= 2
-        ORDER BY (delayed * 1.0 / total) DESC
-        LIMIT 1
-    ''')
-    row = cursor.fetchone()
+def _analyze_delay_patterns(categories: List[sqlite3.Row]) -> Dict[str, Any]:
+    """Analyze delay patterns by category."""
+    # Category with the highest delay rate among those with 2+ projects
+    candidates = [row for row in categories if row['total'] >= 2]
+    row = max(candidates, key=lambda r: r['delayed'] / r['total'], default=None)
 
     if row and row['delayed'] > 0:
         delay_rate = (row['delayed'] / row['total']) * 100
@@ -128,11 +149,10 @@ def _analyze_vendor_performance(cursor: sqlite3.Cursor) -> Dict[str, Any]:
         SELECT
             vendor_name,
             COUNT(*) as projects,
-            AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100 as delay_rate,
-            AVG(CASE WHEN is_over_budget = 1 THEN 1.0 ELSE 0.0 END) * 100 as overbudget_rate
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        AND vendor_name IS NOT NULL AND vendor_name != ''
+            COALESCE(AVG(is_delayed), 0) * 100 as delay_rate,
+            COALESCE(AVG(is_over_budget), 0) * 100 as overbudget_rate
+        FROM live_contracts
+        WHERE vendor_name IS NOT NULL AND vendor_name != ''
         GROUP BY vendor_name
         HAVING projects >= 2
         ORDER BY (delay_rate + overbudget_rate) DESC
@@ -154,24 +174,14 @@ def _analyze_vendor_performance(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return None
 
 
-def _analyze_category_efficiency(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+def _analyze_category_efficiency(categories: List[sqlite3.Row]) -> Dict[str, Any]:
     """Analyze spending efficiency by category."""
-    cursor.execute('''
-        SELECT
-            surtax_category,
-            SUM(current_amount) as budget,
-            SUM(amount_paid) as spent,
-            AVG(percent_complete) as progress
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
-        HAVING budget > 0
-    ''')
-
     best_category = None
     best_efficiency = 0
 
-    for row in cursor.fetchall():
+    for row in categories:
+        if not row['budget'] or row['budget'] <= 0:
+            continue
         spend_rate = (row['spent'] or 0) / row['budget'] * 100 if row['budget'] else 0
         progress = row['progress'] or 0
 
@@ -196,18 +206,8 @@ def _analyze_category_efficiency(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     return None
 
 
-def _analyze_spending_efficiency(cursor: sqlite3.Cursor) -> Dict[str, Any]:
-    """Analyze overall spending rate vs progress."""
-    cursor.execute('''
-        SELECT
-            SUM(current_amount) as budget,
-            SUM(amount_paid) as spent,
-            AVG(percent_complete) as progress
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND status = 'Active'
-    ''')
-    row = cursor.fetchone()
-
+def _analyze_spending_efficiency(row: sqlite3.Row) -> Dict[str, Any]:
+    """Analyze overall spending rate (active projects) vs progress."""
     if row and row['budget'] and row['budget'] > 0:
         spend_rate = (row['spent'] or 0) / row['budget'] * 100
         progress = row['progress'] or 0
@@ -5,14 +5,15 @@ Handles file uploads, storage, and retrieval for project documents.
 Supports various document types including contracts, invoices, photos, and reports.
 """
 
+import hashlib
 import os
 import uuid
 import sqlite3
 from pathlib import Path
-from datetime import datetime
 from typing import Dict, List, Optional, Tuple, BinaryIO
 from werkzeug.utils import secure_filename
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 # Allowed file extensions and their MIME types
@@ -35,6 +36,7 @@ ALLOWED_EXTENSIONS = {
     # Other
     'zip': 'application/zip',
 }
+ALLOWED_EXTENSIONS_TEXT = ', '.join(ALLOWED_EXTENSIONS)
 
 # Document type categories
 DOCUMENT_TYPES = [
@@ -54,6 +56,9 @@ DOCUMENT_TYPES = [
 ]
 
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
+# Uploads are copied to disk (and hashed) 1 MB at a time, which bounds the
+# memory each concurrent upload holds
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
 
 @dataclass
@@ -73,32 +78,35 @@ class DocumentInfo:
     is_deleted: bool = False
 
 
+@lru_cache(maxsize=1)
 def get_upload_folder() -> Path:
-    """Get the path to the uploads folder."""
+    """
+    Get the path to the uploads folder, creating it if needed.
+
+    Resolved once per process; call get_upload_folder.cache_clear() after
+    changing UPLOAD_FOLDER.
+    """
     # Try environment variable first
     if 'UPLOAD_FOLDER' in os.environ:
-        return Path(os.environ['UPLOAD_FOLDER'])
+        upload_folder = Path(os.environ['UPLOAD_FOLDER'])
+    else:
+        # Default to data/uploads relative to project root
+        project_root = Path(__file__).parent.parent.parent
+        upload_folder = project_root / 'data' / 'uploads'
 
-    # Default to data/uploads relative to project root
-    project_root = Path(__file__).parent.parent.parent
-    upload_folder = project_root / 'data' / 'uploads'
     upload_folder.mkdir(parents=True, exist_ok=True)
     return upload_folder
 
 
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed."""
-    if '.' not in filename:
-        return False
-    ext = filename.rsplit('.', 1)[1].lower()
-    return ext in ALLOWED_EXTENSIONS
+    return get_file_extension(filename) in ALLOWED_EXTENSIONS
 
 
 def get_file_extension(filename: str) -> str:
     """Get the file extension."""
-    if '.' not in filename:
-        return ''
-    return filename.rsplit('.', 1)[1].lower()
+    _, dot, ext = filename.rpartition('.')
+    return ext.lower() if dot else ''
 
 
 def save_document(
@@ -132,36 +140,49 @@ def save_document(
         return False, "No filename provided", None
 
     if not allowed_file(filename):
-        return False, f"File type not allowed. Allowed: {', '.join(ALLOWED_EXTENSIONS.keys())}", None
+        return False, f"File type not allowed. Allowed: {ALLOWED_EXTENSIONS_TEXT}", None
 
-    # Secure the filename and generate unique storage name
+    # Secure the filename; the stored name comes from the content hash
     safe_filename = secure_filename(filename)
     ext = get_file_extension(safe_filename)
-    unique_filename = f"{uuid.uuid4().hex}.{ext}"
 
     # Determine file path
     upload_folder = get_upload_folder()
 
-    # Organize by year/month for easier management
-    date_folder = datetime.now().strftime('%Y/%m')
-    target_folder = upload_folder / date_folder
-    target_folder.mkdir(parents=True, exist_ok=True)
-
-    file_path = target_folder / unique_filename
-    relative_path = f"{date_folder}/{unique_filename}"
+    # Write under a temporary name until the content hash is known
+    temp_path = upload_folder / f".{uuid.uuid4().hex}.{ext}.part"
 
     try:
-        # Read file content
-        content = file.read()
-        file_size = len(content)
+        # Stream the upload to disk, stopping as soon as it exceeds the cap.
+        # blake2b (hashlib, no extra dependency) hashes each chunk as it goes.
+        content_hash = hashlib.blake2b(digest_size=32)
+        file_size = 0
+        with open(temp_path, 'wb') as f:
+            while True:
+                chunk = file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                file_size += len(chunk)
+                if file_size > MAX_FILE_SIZE:
+                    break
+                content_hash.update(chunk)
+                f.write(chunk)
 
         # Check file size
         if file_size > MAX_FILE_SIZE:
+            temp_path.unlink()
             return False, f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB", None
 
-        # Save file to disk
-        with open(file_path, 'wb') as f:
-            f.write(content)
+        # Identical uploads share one stored file, named by content hash and
+        # spread over subfolders by its first two hex digits
+        digest = content_hash.hexdigest()
+        hash_folder = digest[:2]
+        stored_filename = f"{digest}.{ext}"
+        target_folder = upload_folder / hash_folder
+        target_folder.mkdir(parents=True, exist_ok=True)
+
+        file_path = target_folder / stored_filename
+        relative_path = f"{hash_folder}/{stored_filename}"
 
         # Get MIME type
         mime_type = ALLOWED_EXTENSIONS.get(ext, 'application/octet-stream')
@@ -179,17 +200,39 @@ def save_document(
         ))
 
         document_id = cursor.lastrowid
+
+        # Publish the stored file only once the record is in place; if this
+        # fails the caller does not commit, so the record goes with it
+        if file_path.exists():
+            temp_path.unlink()
+        else:
+            os.replace(temp_path, file_path)
+
         return True, "Document uploaded successfully", document_id
 
     except Exception as e:
-        # Clean up file if database insert fails
-        if file_path.exists():
-            file_path.unlink()
+        # Only the temporary file is ours to remove: a published file may
+        # already be shared with other documents
+        if temp_path.exists():
+            temp_path.unlink()
         return False, f"Error saving document: {str(e)}", None
 
 
+def _document_row(cursor: sqlite3.Cursor, row: tuple) -> DocumentInfo:
+    """Row factory building DocumentInfo from the document columns, in field order."""
+    return DocumentInfo(*row[:11], is_deleted=bool(row[11]))
+
+
+def _document_cursor(cursor: sqlite3.Cursor) -> sqlite3.Cursor:
+    """A cursor on the same connection that returns DocumentInfo rows."""
+    documents = cursor.connection.cursor()
+    documents.row_factory = _document_row
+    return documents
+
+
 def get_document(cursor: sqlite3.Cursor, document_id: int) -> Optional[DocumentInfo]:
     """Get document metadata by ID."""
+    cursor = _document_cursor(cursor)
     cursor.execute('''
         SELECT document_id, contract_id, vendor_id, filename, document_type,
                description, file_path, file_size, mime_type, uploaded_by,
@@ -198,24 +241,7 @@ def get_document(cursor: sqlite3.Cursor, document_id: int) -> Optional[DocumentI
         WHERE document_id = ? AND is_deleted = 0
     ''', (document_id,))
 
-    row = cursor.fetchone()
-    if not row:
-        return None
-
-    return DocumentInfo(
-        document_id=row[0],
-        contract_id=row[1],
-        vendor_id=row[2],
-        filename=row[3],
-        document_type=row[4],
-        description=row[5],
-        file_path=row[6],
-        file_size=row[7],
-        mime_type=row[8],
-        uploaded_by=row[9],
-        uploaded_at=row[10],
-        is_deleted=bool(row[11])
-    )
+    return cursor.fetchone()
 
 
 def get_document_file_path(document: DocumentInfo) -> Path:
@@ -229,6 +255,7 @@ def get_documents_for_contract(
     contract_id: str
 ) -> List[DocumentInfo]:
     """Get all documents for a contract."""
+    cursor = _document_cursor(cursor)
     cursor.execute('''
         SELECT document_id, contract_id, vendor_id, filename, document_type,
                description, file_path, file_size, mime_type, uploaded_by,
@@ -238,23 +265,7 @@ def get_documents_for_contract(
         ORDER BY uploaded_at DESC
     ''', (contract_id,))
 
-    return [
-        DocumentInfo(
-            document_id=row[0],
-            contract_id=row[1],
-            vendor_id=row[2],
-            filename=row[3],
-            document_type=row[4],
-            description=row[5],
-            file_path=row[6],
-            file_size=row[7],
-            mime_type=row[8],
-            uploaded_by=row[9],
-            uploaded_at=row[10],
-            is_deleted=bool(row[11])
-        )
-        for row in cursor.fetchall()
-    ]
+    return cursor.fetchall()
 
 
 def get_all_documents(
@@ -263,6 +274,7 @@ def get_all_documents(
     limit: int = 50
 ) -> List[DocumentInfo]:
     """Get recent documents, optionally filtered by type."""
+    cursor = _document_cursor(cursor)
     if document_type:
         cursor.execute('''
             SELECT document_id, contract_id, vendor_id, filename, document_type,
@@ -284,23 +296,7 @@ def get_all_documents(
             LIMIT ?
         ''', (limit,))
 
-    return [
-        DocumentInfo(
-            document_id=row[0],
-            contract_id=row[1],
-            vendor_id=row[2],
-            filename=row[3],
-            document_type=row[4],
-            description=row[5],
-            file_path=row[6],
-            file_size=row[7],
-            mime_type=row[8],
-            uploaded_by=row[9],
-            uploaded_at=row[10],
-            is_deleted=bool(row[11])
-        )
-        for row in cursor.fetchall()
-    ]
+    return cursor.fetchall()
 
 
 def delete_document(cursor: sqlite3.Cursor, document_id: int) -> bool:
@@ -312,6 +308,7 @@ def delete_document(cursor: sqlite3.Cursor, document_id: int) -> bool:
     return cursor.rowcount > 0
 
 
+@lru_cache(maxsize=1024)
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human-readable format."""
     for unit in ['B', 'KB', 'MB', 'GB']:
@@ -0,0 +1,206 @@
+"""
+Materialized summary, vendor, category and school rollups of the contracts
+table.
+
+The aggregates behind the overview, executive, compliance, public portal,
+vendor, analytics, vendor profile and schools pages are stored in
+contract_rollup_* tables. Triggers on
+contracts only flag the rollups as stale; write paths rebuild them with
+refresh_stale_rollups() in their own transaction: every app write request
+(via database.commit_db), the import scripts and the migration. Contract
+imports from outside the app are picked up by the next of those. Readers
+never rebuild: while the tables are missing or stale they fall back to
+running the aggregate query inline.
+"""
+
+import sqlite3
+from typing import Dict
+
+# Rollup table name -> aggregate query it materializes
+ROLLUP_QUERIES: Dict[str, str] = {
+    # Single row of portfolio-wide totals
+    'contract_rollup_summary': '''
+        SELECT
+            COUNT(*) as total_projects,
+            COALESCE(SUM(current_amount), 0) as total_budget,
+            COALESCE(SUM(total_paid), 0) as total_spent,
+            COUNT(CASE WHEN status = 'Active' THEN 1 END) as active_projects,
+            COUNT(CASE WHEN status = 'Completed' THEN 1 END) as completed_projects,
+            COALESCE(SUM(is_delayed), 0) as delayed_projects,
+            COALESCE(SUM(is_over_budget), 0) as over_budget_projects,
+            AVG(percent_complete) as avg_completion,
+            AVG(budget_variance_pct) as avg_variance,
+            AVG(CASE WHEN is_delayed = 1 THEN delay_days ELSE 0 END) as avg_delay,
+            -- Distinct counts as GROUP BY walks of the school/vendor indexes
+            -- rather than COUNT(DISTINCT) temp b-trees
+            (SELECT COUNT(*) FROM (
+                SELECT school_name FROM contracts
+                WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
+                GROUP BY school_name
+            )) as school_count,
+            (SELECT COUNT(*) FROM (
+                SELECT vendor_name FROM contracts
+                WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND vendor_name IS NOT NULL
+                GROUP BY vendor_name
+            )) as vendor_count
+        FROM contracts
+        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+    ''',
+    'contract_rollup_vendor': '''
+        SELECT
+            vendor_name,
+            COUNT(*) as project_count,
+            SUM(current_amount) as total_value,
+            COALESCE(AVG(is_delayed), 0) * 100 as delay_rate,
+            COALESCE(AVG(is_over_budget), 0) * 100 as overbudget_rate,
+            AVG(percent_complete) as avg_completion,
+            AVG(cost_performance_index) as avg_cpi,
+            -- Performance score: 100 - delay_rate - overbudget_rate + (cpi bonus)
+            100 - (COALESCE(AVG(is_delayed), 0) * 50)
+                - (COALESCE(AVG(is_over_budget), 0) * 50)
+                + COALESCE((AVG(cost_performance_index) - 1) * 20, 0) as performance_score,
+            GROUP_CONCAT(DISTINCT surtax_category) as categories,
+            COALESCE(SUM(is_delayed), 0) as delayed_count,
+            COALESCE(SUM(is_over_budget), 0) as over_budget_count
+        FROM contracts
+        WHERE is_deleted = 0 AND vendor_name IS NOT NULL AND vendor_name != ''
+        GROUP BY vendor_name
+    ''',
+    'contract_rollup_category': '''
+        SELECT
+            surtax_category,
+            COUNT(*) as project_count,
+            COALESCE(SUM(current_amount), 0) as total_budget,
+            COALESCE(SUM(total_paid), 0) as total_spent,
+            AVG(percent_complete) as avg_completion,
+            AVG(current_amount) as avg_budget,
+            MIN(current_amount) as min_budget,
+            MAX(current_amount) as max_budget,
+            COALESCE(AVG(is_delayed), 0) * 100 as delay_rate,
+            COALESCE(AVG(is_over_budget), 0) * 100 as overbudget_rate,
+            AVG(cost_performance_index) as avg_cpi
+        FROM contracts
+        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        GROUP BY surtax_category
+    ''',
+    'contract_rollup_school': '''
+        SELECT
+            school_name,
+            COUNT(*) as project_count,
+            COALESCE(SUM(current_amount), 0) as total_value,
+            COALESCE(SUM(total_paid), 0) as total_spent,
+            AVG(percent_complete) as avg_completion,
+            COALESCE(SUM(is_delayed), 0) as delayed_count
+        FROM contracts
+        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
+        GROUP BY school_name
+    ''',
+}
+
+# Contract columns the rollups aggregate over; updates to other columns
+# (e.g. alert timestamps) leave the rollups current
+ROLLUP_SOURCE_COLUMNS = (
+    'vendor_name', 'school_name', 'surtax_category', 'status', 'is_deleted',
+    'current_amount', 'total_paid', 'percent_complete', 'budget_variance_pct',
+    'is_delayed', 'delay_days', 'is_over_budget', 'cost_performance_index',
+)
+
+_MARK_STALE = 'UPDATE contract_rollup_state SET is_stale = 1 WHERE is_stale = 0;'
+
+ROLLUP_TRIGGERS = (
+    f'''
+        CREATE TRIGGER IF NOT EXISTS trg_contracts_rollup_insert
+        AFTER INSERT ON contracts
+        BEGIN {_MARK_STALE} END
+    ''',
+    f'''
+        CREATE TRIGGER IF NOT EXISTS trg_contracts_rollup_delete
+        AFTER DELETE ON contracts
+        BEGIN {_MARK_STALE} END
+    ''',
+    f'''
+        CREATE TRIGGER IF NOT EXISTS trg_contracts_rollup_update
+        AFTER UPDATE OF {', '.join(ROLLUP_SOURCE_COLUMNS)} ON contracts
+        BEGIN {_MARK_STALE} END
+    ''',
+)
+
+
+def create_rollup_tables(conn: sqlite3.Connection):
+    """
+    Create the rollup tables, state row and staleness triggers, then
+    populate the rollups. The caller commits.
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS contract_rollup_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            is_stale INTEGER NOT NULL DEFAULT 1,
+            refreshed_at TEXT
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO contract_rollup_state (id, is_stale) VALUES (1, 1)')
+
+    for table, query in ROLLUP_QUERIES.items():
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM ({query}) WHERE 0')
+
+    for trigger in ROLLUP_TRIGGERS:
+        conn.execute(trigger)
+
+    refresh_rollups(conn)
+
+
+def refresh_rollups(conn: sqlite3.Connection):
+    """Rebuild every rollup table from contracts. The caller commits."""
+    for table, query in ROLLUP_QUERIES.items():
+        conn.execute(f'DELETE FROM {table}')
+        conn.execute(f'INSERT INTO {table} {query}')
+
+    conn.execute('''
+        UPDATE contract_rollup_state
+        SET is_stale = 0, refreshed_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''')
+
+
+def refresh_stale_rollups(conn: sqlite3.Connection) -> bool:
+    """
+    Rebuild the rollups if contract changes have flagged them stale.
+
+    For write paths: call on the writable connection after updating
+    contracts, inside the same transaction; the caller commits. Returns
+    False if the rollup tables do not exist.
+    """
+    try:
+        row = conn.execute('SELECT is_stale FROM contract_rollup_state WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        return False
+
+    if row is None:
+        return False
+    if row[0]:
+        refresh_rollups(conn)
+    return True
+
+
+def rollups_current(cursor: sqlite3.Cursor) -> bool:
+    """
+    Return True if the rollup tables exist and reflect the current
+    contracts. Never rebuilds: readers must not take the write lock.
+    """
+    try:
+        cursor.execute('SELECT is_stale FROM contract_rollup_state WHERE id = 1')
+    except sqlite3.OperationalError:
+        return False
+
+    row = cursor.fetchone()
+    return row is not None and not row[0]
+
+
+def rollup_source(cursor: sqlite3.Cursor, table: str) -> str:
+    """
+    Return the FROM-clause source for a rollup: the materialized table when
+    it is current, otherwise the aggregate query as a subquery.
+    """
+    if rollups_current(cursor):
+        return table
+    return f'({ROLLUP_QUERIES[table]})'
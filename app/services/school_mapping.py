@@ -9,6 +9,8 @@ import re
 import sqlite3
 from typing import Dict, List, Optional, Tuple
 
+from app.services.rollups import refresh_stale_rollups
+
 # Known Marion County Schools - ordered by specificity (more specific first)
 MARION_COUNTY_SCHOOLS = [
     # High Schools (check these FIRST to avoid matching elementary)
@@ -230,7 +232,8 @@ def map_school_for_contract(
 
 def auto_map_schools(cursor: sqlite3.Cursor) -> Dict[str, int]:
     """
-    Automatically map school names for contracts missing them.
+    Automatically map school names for contracts missing them, then
+    rebuild the school rollups in the same transaction. The caller commits.
 
     Returns:
         Dictionary with mapping statistics
@@ -272,6 +275,8 @@ def auto_map_schools(cursor: sqlite3.Cursor) -> Dict[str, int]:
         else:
             stats["still_unmapped"] += 1
 
+    refresh_stale_rollups(cursor.connection)
+
     return stats
 
 
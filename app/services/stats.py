@@ -2,9 +2,41 @@
 Statistical calculations and aggregations for the dashboard.
 """
 
-from typing import Dict, Any, List
+from collections import defaultdict
+from typing import Dict, Any, List, Tuple
 import sqlite3
 
+from app.cache import memoize
+from app.database import has_table
+from app.services.rollups import rollup_source
+
+
+# Default capital-expenditure categories; the migration seeds these into
+# surtax_category_types, which is used instead once it exists
+CAPITAL_CATEGORIES = ('New Construction', 'Renovation', 'Safety & Security', 'Technology', 'Site Improvements')
+
+# Summary row columns exposed as the dashboard overview stats
+OVERVIEW_STAT_KEYS = (
+    'total_projects', 'total_budget', 'total_spent',
+    'active_projects', 'completed_projects',
+    'delayed_projects', 'over_budget_projects', 'avg_completion',
+)
+
+
+@memoize()
+def get_contract_summary(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+    """
+    Get the full portfolio summary row.
+
+    Returns:
+        Dictionary with the overview totals plus avg_variance, avg_delay,
+        school_count and vendor_count
+    """
+    cursor.execute(f"SELECT * FROM {rollup_source(cursor, 'contract_rollup_summary')}")
+
+    row = cursor.fetchone()
+    return dict(row) if row else {}
+
 
 def get_overview_stats(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     """
@@ -12,28 +44,20 @@ def get_overview_stats(cursor: sqlite3.Cursor) -> Dict[str, Any]:
 
     Returns:
         Dictionary with total_projects, total_budget, total_spent,
-        active_projects, completed_projects, delayed_projects, etc.
+        active_projects, completed_projects, delayed_projects,
+        concerns_count, etc.
     """
-    cursor.execute('''
-        SELECT
-            COUNT(*) as total_projects,
-            COALESCE(SUM(current_amount), 0) as total_budget,
-            COALESCE(SUM(total_paid), 0) as total_spent,
-            COUNT(CASE WHEN status = 'Active' THEN 1 END) as active_projects,
-            COUNT(CASE WHEN status = 'Completed' THEN 1 END) as completed_projects,
-            COUNT(CASE WHEN is_delayed = 1 THEN 1 END) as delayed_projects,
-            COUNT(CASE WHEN is_over_budget = 1 THEN 1 END) as over_budget_projects,
-            AVG(percent_complete) as avg_completion
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-    ''')
+    summary = get_contract_summary(cursor)
+    if not summary:
+        return {}
 
-    row = cursor.fetchone()
-    if row:
-        return dict(row)
-    return {}
+    stats = {key: summary[key] for key in OVERVIEW_STAT_KEYS}
+    # Concerns = delayed + over budget (a project can count twice)
+    stats['concerns_count'] = stats['delayed_projects'] + stats['over_budget_projects']
+    return stats
 
 
+@memoize()
 def get_spending_by_category(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
     """
     Get spending breakdown by surtax category.
@@ -41,22 +65,65 @@ def get_spending_by_category(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
     Returns:
         List of dictionaries with category, project_count, total_budget, total_spent
     """
-    cursor.execute('''
+    cursor.execute(f'''
         SELECT
             surtax_category as category,
-            COUNT(*) as project_count,
-            COALESCE(SUM(current_amount), 0) as total_budget,
-            COALESCE(SUM(total_paid), 0) as total_spent,
-            AVG(percent_complete) as avg_completion
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
-        GROUP BY surtax_category
+            project_count, total_budget, total_spent, avg_completion
+        FROM {rollup_source(cursor, 'contract_rollup_category')}
         ORDER BY total_budget DESC
     ''')
 
     return [dict(row) for row in cursor.fetchall()]
 
 
+@memoize()
+def get_capital_project_counts(cursor: sqlite3.Cursor) -> Tuple[int, int]:
+    """
+    Count active projects in capital-expenditure categories.
+
+    Returns:
+        (capital_count, total_count)
+    """
+    source = rollup_source(cursor, 'contract_rollup_category')
+
+    if has_table(cursor, 'surtax_category_types'):
+        cursor.execute(f'''
+            SELECT
+                COALESCE(SUM(CASE WHEN t.kind = 'capital' THEN r.project_count END), 0),
+                COALESCE(SUM(r.project_count), 0)
+            FROM {source} r
+            LEFT JOIN surtax_category_types t ON t.name = r.surtax_category
+        ''')
+    else:
+        cursor.execute(f'''
+            SELECT
+                COALESCE(SUM(CASE WHEN surtax_category IN ({', '.join('?' * len(CAPITAL_CATEGORIES))})
+                    THEN project_count END), 0),
+                COALESCE(SUM(project_count), 0)
+            FROM {source}
+        ''', CAPITAL_CATEGORIES)
+
+    capital_count, total_count = cursor.fetchone()
+    return capital_count, total_count
+
+
+@memoize()
+def get_surtax_categories(cursor: sqlite3.Cursor) -> List[str]:
+    """
+    Get the surtax categories that have active projects, in name order.
+
+    Returns:
+        List of category names
+    """
+    cursor.execute(f'''
+        SELECT surtax_category
+        FROM {rollup_source(cursor, 'contract_rollup_category')}
+        ORDER BY surtax_category
+    ''')
+
+    return [row[0] for row in cursor.fetchall()]
+
+
 def get_spending_by_school(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
     """
     Get spending breakdown by school.
@@ -71,8 +138,8 @@ def get_spending_by_school(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
             COALESCE(SUM(current_amount), 0) as total_budget,
             COALESCE(SUM(total_paid), 0) as total_spent,
             AVG(percent_complete) as avg_completion
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL AND school_name IS NOT NULL
+        FROM live_contracts
+        WHERE school_name IS NOT NULL
         GROUP BY school_name
         ORDER BY total_budget DESC
     ''')
@@ -94,8 +161,7 @@ def get_budget_vs_actual(cursor: sqlite3.Cursor) -> Dict[str, Any]:
             COALESCE(SUM(current_amount), 0) as current_budget,
             COALESCE(SUM(total_paid), 0) as actual_spent,
             AVG(percent_complete) as avg_progress
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        FROM live_contracts
     ''')
 
     row = cursor.fetchone()
@@ -127,10 +193,170 @@ def get_expenditure_type_breakdown(cursor: sqlite3.Cursor) -> List[Dict[str, Any
             COUNT(*) as count,
             COALESCE(SUM(current_amount), 0) as total_budget,
             COALESCE(SUM(total_paid), 0) as total_spent
-        FROM contracts
-        WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        FROM live_contracts
         GROUP BY expenditure_type
         ORDER BY total_budget DESC
     ''')
 
     return [dict(row) for row in cursor.fetchall()]
+
+
+@memoize()
+def get_analytics_breakdown(cursor: sqlite3.Cursor) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Get spending by category and project counts/values by status.
+
+    Returns:
+        Dictionary with category_data and status_data lists
+    """
+    cursor.execute(f'''
+        SELECT surtax_category, project_count, total_budget, total_spent, avg_completion
+        FROM {rollup_source(cursor, 'contract_rollup_category')}
+        ORDER BY total_budget DESC
+    ''')
+    category_data = [dict(row) for row in cursor.fetchall()]
+
+    cursor.execute('''
+        SELECT
+            status,
+            COUNT(*) as count,
+            SUM(current_amount) as value
+        FROM live_contracts
+        GROUP BY status
+    ''')
+    status_data = [dict(row) for row in cursor.fetchall()]
+
+    return {'category_data': category_data, 'status_data': status_data}
+
+
+def _sum(values):
+    """SUM() semantics: total of non-null values, or None if there are none."""
+    present = [v for v in values if v is not None]
+    return sum(present) if present else None
+
+
+def _avg(values):
+    """AVG() semantics: mean of non-null values, or None if there are none."""
+    present = [v for v in values if v is not None]
+    return sum(present) / len(present) if present else None
+
+
+def _columns(rows):
+    """Transpose result rows into per-column tuples, keyed by column name."""
+    if not rows:
+        return defaultdict(tuple)
+    return dict(zip(rows[0].keys(), zip(*rows)))
+
+
+def _summarize_budget_performance(projects):
+    """
+    Build the budget performance summary, per-category EVA breakdown and
+    spending concerns from the page's project rows. The rows are transposed
+    once so each aggregate runs over a single column.
+    """
+    cols = _columns(projects)
+
+    total_ev = _sum(cols['earned_value'])
+    total_ac = _sum(cols['actual_cost'])
+    cpis = [c for c in cols['cost_performance_index'] if c is not None]
+
+    summary = {
+        'total_original': _sum(cols['original_amount']) or 0,
+        'total_current': _sum(cols['current_amount']) or 0,
+        'total_spent': _sum(cols['total_paid']) or 0,
+        'avg_progress': _avg(cols['percent_complete']),
+        # EVA totals
+        'total_pv': _sum(cols['planned_value']) or 0,
+        'total_ev': total_ev or 0,
+        'total_ac': total_ac or 0,
+        # Overall CPI (EV/AC)
+        'portfolio_cpi': total_ev / total_ac if total_ev is not None and total_ac else None,
+        # Count of projects by health
+        'on_budget_count': sum(1 for c in cpis if c >= 1.0),
+        'near_budget_count': sum(1 for c in cpis if 0.9 <= c < 1.0),
+        'over_budget_count': sum(1 for c in cpis if c < 0.9),
+    }
+
+    by_cat = {}
+    for category, row in zip(cols['surtax_category'], projects):
+        by_cat.setdefault(category, []).append(row)
+
+    by_category = []
+    for category, rows in by_cat.items():
+        cat_cols = _columns(rows)
+        by_category.append({
+            'category': category,
+            'count': len(rows),
+            'budget': _sum(cat_cols['current_amount']) or 0,
+            'spent': _sum(cat_cols['total_paid']) or 0,
+            'avg_progress': _avg(cat_cols['percent_complete']),
+            'avg_cpi': _avg(cat_cols['cost_performance_index']),
+        })
+    by_category.sort(key=lambda c: c['budget'], reverse=True)
+
+    # Projects with spending outpacing progress (potential concerns)
+    concerns = sorted(
+        (cpi, i)
+        for i, (paid, cpi) in enumerate(zip(cols['total_paid'], cols['cost_performance_index']))
+        if (paid or 0) > 0 and cpi is not None and cpi < 0.9
+    )
+    spending_concerns = []
+    for cpi, i in concerns[:10]:
+        p = projects[i]
+        spending_concerns.append({
+            'contract_id': p['contract_id'],
+            'title': p['title'],
+            'school_name': p['school_name'],
+            'percent_complete': p['percent_complete'],
+            'spend_pct': p['budget_utilization'],
+            'cost_performance_index': cpi,
+        })
+
+    return summary, by_category, spending_concerns
+
+
+@memoize()
+def get_budget_performance(cursor: sqlite3.Cursor) -> Dict[str, Any]:
+    """
+    Get budget vs actual vs progress data with Earned Value metrics.
+
+    Returns:
+        Dictionary with projects (largest first), summary, by_category
+        and spending_concerns
+    """
+    # Get projects with budget, progress, and EVA data
+    cursor.execute('''
+        SELECT
+            contract_id, title, school_name, surtax_category,
+            original_amount, current_amount, total_paid,
+            percent_complete,
+            CASE WHEN original_amount > 0
+                THEN (total_paid / original_amount * 100)
+                ELSE 0 END as spend_rate,
+            CASE WHEN current_amount > 0
+                THEN (total_paid / current_amount * 100)
+                ELSE 0 END as budget_utilization,
+            -- Earned Value Analysis fields
+            planned_value, earned_value, actual_cost,
+            cost_variance, cost_performance_index,
+            -- Spending vs Progress indicator
+            CASE
+                WHEN percent_complete > 0 AND current_amount > 0
+                THEN (total_paid / current_amount * 100) - percent_complete
+                ELSE 0
+            END as spend_progress_gap
+        FROM live_contracts
+        ORDER BY current_amount DESC
+    ''')
+    rows = cursor.fetchall()
+
+    # Summary, category breakdown and concerns are all derived from the
+    # project rows above rather than re-scanning contracts for each one
+    summary, by_category, spending_concerns = _summarize_budget_performance(rows)
+
+    return {
+        'projects': [dict(row) for row in rows],
+        'summary': summary,
+        'by_category': by_category,
+        'spending_concerns': spending_concerns,
+    }
@@ -0,0 +1,64 @@
+"""
+Watchlist Service
+
+Watched contract IDs are stored in the user_watchlist table, keyed by an
+opaque token kept in the session cookie. Sessions from before the table
+existed carry the IDs themselves under session['watchlist']; those are
+still listed, and are moved into the table on the next watchlist change.
+"""
+
+import sqlite3
+import uuid
+from typing import List, MutableMapping, Optional
+
+# Session keys: the watchlist token, and the old cookie-stored ID list
+WATCHLIST_TOKEN_KEY = 'watchlist_id'
+LEGACY_WATCHLIST_KEY = 'watchlist'
+
+
+def get_watchlist_token(session: MutableMapping, create: bool = False) -> Optional[str]:
+    """Get this browser's watchlist token, issuing one if requested."""
+    watchlist_id = session.get(WATCHLIST_TOKEN_KEY)
+    if watchlist_id is None and create:
+        watchlist_id = session[WATCHLIST_TOKEN_KEY] = uuid.uuid4().hex
+    return watchlist_id
+
+
+def get_watched_ids(cursor: sqlite3.Cursor, session: MutableMapping) -> List[str]:
+    """Contract IDs on this browser's watchlist, in the order they were added."""
+    watched_ids = []
+
+    watchlist_id = session.get(WATCHLIST_TOKEN_KEY)
+    if watchlist_id is not None:
+        cursor.execute('''
+            SELECT contract_id FROM user_watchlist
+            WHERE session_id = ?
+            ORDER BY rowid
+        ''', (watchlist_id,))
+        watched_ids = [row[0] for row in cursor.fetchall()]
+
+    for contract_id in session.get(LEGACY_WATCHLIST_KEY, ()):
+        if contract_id not in watched_ids:
+            watched_ids.append(contract_id)
+
+    return watched_ids
+
+
+def import_session_watchlist(cursor: sqlite3.Cursor, session: MutableMapping) -> Optional[str]:
+    """
+    Move a cookie-stored watchlist into user_watchlist and return the token.
+
+    Call before changing the watchlist, on a writable connection; the
+    caller commits. Returns the existing token (or None) when there is
+    nothing to move.
+    """
+    legacy_ids = session.pop(LEGACY_WATCHLIST_KEY, None)
+    if not legacy_ids:
+        return session.get(WATCHLIST_TOKEN_KEY)
+
+    watchlist_id = get_watchlist_token(session, create=True)
+    cursor.executemany(
+        'INSERT OR IGNORE INTO user_watchlist (session_id, contract_id) VALUES (?, ?)',
+        [(watchlist_id, contract_id) for contract_id in legacy_ids]
+    )
+    return watchlist_id
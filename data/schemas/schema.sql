@@ -39,10 +39,10 @@ CREATE TABLE IF NOT EXISTS contracts (
     percent_complete REAL DEFAULT 0,
 
     -- Flags
-    is_delayed INTEGER DEFAULT 0,
+    is_delayed INTEGER NOT NULL DEFAULT 0 CHECK (is_delayed IN (0, 1)),
     delay_days INTEGER DEFAULT 0,
     delay_reason TEXT,
-    is_over_budget INTEGER DEFAULT 0,
+    is_over_budget INTEGER NOT NULL DEFAULT 0 CHECK (is_over_budget IN (0, 1)),
     is_deleted INTEGER DEFAULT 0,
 
     -- Metadata
@@ -151,6 +151,14 @@ CREATE TABLE IF NOT EXISTS documents (
     FOREIGN KEY (contract_id) REFERENCES contracts(id)
 );
 
+-- Per-browser watchlists (session_id is an opaque token from the session cookie)
+CREATE TABLE IF NOT EXISTS user_watchlist (
+    session_id TEXT NOT NULL,
+    contract_id TEXT NOT NULL,
+    added_date TEXT DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, contract_id)
+);
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_contracts_school ON contracts(school_name);
 CREATE INDEX IF NOT EXISTS idx_contracts_vendor ON contracts(vendor_name);
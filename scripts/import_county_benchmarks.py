@@ -22,6 +22,11 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.rollups import refresh_stale_rollups
+
 
 def get_db_path():
     """Get the database path."""
@@ -438,6 +443,11 @@ def main():
             print("  python import_county_benchmarks.py --sample   # Load sample data")
             print("  python import_county_benchmarks.py --summary  # View existing data")
 
+        # Benchmarks do not feed the rollups, but rebuild any that contract
+        # imports left stale while a writable connection is open anyway
+        if refresh_stale_rollups(conn):
+            conn.commit()
+
         show_summary(conn)
 
     finally:
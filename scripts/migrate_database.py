@@ -4,8 +4,12 @@ Database Migration Script for Florida School Surtax Oversight Dashboard
 This script adds new columns and tables needed for enhanced analytics:
 1. Enhanced vendor fields
 2. Expenditure type (Capital vs Operating)
-3. Watchlist support
+3. Watchlist support (per-browser user_watchlist table)
 4. Earned Value Analysis fields
+5. Covering indexes for dashboard aggregate queries
+6. Materialized summary/vendor/category/school rollups
+7. 0/1 normalization of the is_delayed / is_over_budget flags
+8. Surtax category classification (capital vs other)
 
 Run this script to upgrade an existing contracts database.
 """
@@ -14,6 +18,12 @@ import sqlite3
 import sys
 from pathlib import Path
 
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services.rollups import ROLLUP_QUERIES, create_rollup_tables
+from app.services.stats import CAPITAL_CATEGORIES
+
 
 def get_db_path():
     """Get the database path from the main project."""
@@ -201,6 +211,57 @@ def create_project_milestones_table(conn):
     return True
 
 
+def create_category_types_table(conn):
+    """Create and seed the surtax category classification table."""
+    cursor = conn.cursor()
+
+    if table_exists(cursor, 'surtax_category_types'):
+        # Earlier runs seeded 'Safety/Security'; the category is 'Safety & Security'
+        cursor.execute('''
+            UPDATE OR IGNORE surtax_category_types SET name = 'Safety & Security'
+            WHERE name = 'Safety/Security'
+        ''')
+        cursor.execute("DELETE FROM surtax_category_types WHERE name = 'Safety/Security'")
+        print("  surtax_category_types table already exists")
+        return False
+
+    cursor.execute('''
+        CREATE TABLE surtax_category_types (
+            name TEXT PRIMARY KEY,
+            kind TEXT NOT NULL          -- capital; unlisted categories are unclassified
+        ) WITHOUT ROWID
+    ''')
+    cursor.executemany(
+        "INSERT INTO surtax_category_types (name, kind) VALUES (?, 'capital')",
+        [(name,) for name in CAPITAL_CATEGORIES]
+    )
+
+    print(f"  Created surtax_category_types table ({len(CAPITAL_CATEGORIES)} capital categories)")
+    return True
+
+
+def create_user_watchlist_table(conn):
+    """Create the per-browser watchlist table used by the watchlist API."""
+    cursor = conn.cursor()
+
+    if table_exists(cursor, 'user_watchlist'):
+        print("  user_watchlist table already exists")
+        return False
+
+    # session_id is an opaque token from the session cookie
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_watchlist (
+            session_id TEXT NOT NULL,
+            contract_id TEXT NOT NULL,
+            added_date TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (session_id, contract_id)
+        )
+    ''')
+
+    print("  Created user_watchlist table")
+    return True
+
+
 def populate_vendors_from_contracts(conn):
     """Populate vendors table from existing contract data."""
     cursor = conn.cursor()
@@ -217,7 +278,7 @@ def populate_vendors_from_contracts(conn):
             vendor_name,
             COUNT(*) as project_count,
             SUM(current_amount) as total_value,
-            AVG(CASE WHEN is_delayed = 1 THEN 1.0 ELSE 0.0 END) * 100 as delay_rate,
+            COALESCE(AVG(is_delayed), 0) * 100 as delay_rate,
             AVG(budget_variance_pct) as avg_variance
         FROM contracts
         WHERE vendor_name IS NOT NULL AND vendor_name != '' AND is_deleted = 0
@@ -256,6 +317,28 @@ def set_default_expenditure_type(conn):
     return updated > 0
 
 
+def normalize_status_flags(conn):
+    """
+    Store is_delayed / is_over_budget strictly as 0 or 1 so dashboard
+    queries can aggregate the columns directly (AVG/SUM) without CASE.
+    """
+    cursor = conn.cursor()
+
+    updated = 0
+    for flag in ('is_delayed', 'is_over_budget'):
+        cursor.execute(f'''
+            UPDATE contracts
+            SET {flag} = COALESCE({flag} = 1, 0)
+            WHERE {flag} IS NULL OR {flag} NOT IN (0, 1)
+        ''')
+        updated += cursor.rowcount
+
+    if updated > 0:
+        print(f"  Normalized {updated} status flag values to 0/1")
+
+    return updated > 0
+
+
 def calculate_earned_value_metrics(conn):
     """Calculate initial Earned Value metrics for projects."""
     cursor = conn.cursor()
@@ -297,6 +380,103 @@ def calculate_earned_value_metrics(conn):
     return updated > 0
 
 
+def create_performance_indexes(conn):
+    """Create covering indexes for the dashboard's aggregate queries."""
+    cursor = conn.cursor()
+
+    # Partial indexes carry the dashboard-wide "active surtax project" predicate.
+    # The predicate columns are appended so SQLite treats them as covering and
+    # answers the aggregates without touching the table.
+    indexes = [
+        ('idx_contracts_active', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_active ON contracts(
+                status, is_delayed, is_over_budget, current_amount, total_paid, percent_complete,
+                is_deleted, surtax_category
+            ) WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        ('idx_contracts_active_category', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_active_category ON contracts(
+                surtax_category, current_amount, total_paid, is_deleted
+            ) WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        # Category/vendor rollups (vendor profile tool) without a temp GROUP BY
+        ('idx_contracts_active_vendor', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_active_vendor ON contracts(
+                surtax_category, vendor_name, current_amount, is_delayed, is_over_budget,
+                cost_performance_index, is_deleted
+            ) WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        # Per-school rollups (schools page, map view)
+        ('idx_contracts_active_school', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_active_school ON contracts(
+                school_name, current_amount, total_paid, percent_complete, is_delayed,
+                is_deleted, surtax_category
+            ) WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        # Vendor performance page filters on vendor_name rather than surtax_category
+        ('idx_contracts_vendor_rollup', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_vendor_rollup ON contracts(
+                vendor_name, is_deleted, current_amount, is_delayed, is_over_budget,
+                percent_complete, cost_performance_index, surtax_category
+            )
+        '''),
+        # Projects listing sorts (default by value, and by risk) read rows in index order
+        ('idx_contracts_value', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_value ON contracts(current_amount DESC)
+            WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        ('idx_contracts_risk', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_risk ON contracts(is_delayed DESC, delay_days DESC)
+            WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        # Upcoming completions (Ask AI) and recently completed (public portal)
+        # read a status's end-date range in order
+        ('idx_contracts_end_date', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_end_date ON contracts(status, current_end_date)
+            WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+        '''),
+        # Concerns page reads only the delayed/over-budget rows it lists, in display order
+        ('idx_contracts_concerns', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_concerns ON contracts(
+                is_over_budget DESC, is_delayed DESC, delay_days DESC
+            ) WHERE is_deleted = 0 AND surtax_category IS NOT NULL
+                AND (is_delayed = 1 OR is_over_budget = 1)
+        '''),
+        # Alerts page top-5 lists stop after five index entries
+        ('idx_contracts_delayed', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_delayed ON contracts(delay_days DESC)
+            WHERE is_deleted = 0 AND is_delayed = 1
+        '''),
+        ('idx_contracts_over_budget', '''
+            CREATE INDEX IF NOT EXISTS idx_contracts_over_budget ON contracts(budget_variance_pct DESC)
+            WHERE is_deleted = 0 AND is_over_budget = 1
+        '''),
+    ]
+
+    created = []
+    for name, sql in indexes:
+        try:
+            cursor.execute(sql)
+            created.append(name)
+        except sqlite3.OperationalError as e:
+            print(f"  Warning: Could not create {name}: {e}")
+
+    if created:
+        print(f"  Ensured indexes: {', '.join(created)}")
+
+    # Refresh planner statistics so the new indexes are chosen
+    cursor.execute('ANALYZE contracts')
+
+    return len(created) > 0
+
+
+def create_contract_rollups(conn):
+    """Create and populate the rollup tables and their staleness triggers."""
+    create_rollup_tables(conn)
+    print(f"  Built rollups: {', '.join(ROLLUP_QUERIES)}")
+    return True
+
+
 def run_migration():
     """Run all migrations."""
     db_path = get_db_path()
@@ -312,24 +492,39 @@ def run_migration():
         print("1. Migrating contracts table...")
         migrate_contracts_table(conn)
 
-        print("\n2. Creating vendors table...")
+        print("\n2. Normalizing status flags...")
+        normalize_status_flags(conn)
+
+        print("\n3. Creating vendors table...")
         create_vendors_table(conn)
 
-        print("\n3. Creating county_benchmarks table...")
+        print("\n4. Creating county_benchmarks table...")
         create_county_benchmarks_table(conn)
 
-        print("\n4. Creating project_milestones table...")
+        print("\n5. Creating project_milestones table...")
         create_project_milestones_table(conn)
 
-        print("\n5. Populating vendors from contract data...")
+        print("\n6. Creating surtax_category_types table...")
+        create_category_types_table(conn)
+
+        print("\n7. Creating user_watchlist table...")
+        create_user_watchlist_table(conn)
+
+        print("\n8. Populating vendors from contract data...")
         populate_vendors_from_contracts(conn)
 
-        print("\n6. Setting default expenditure types...")
+        print("\n9. Setting default expenditure types...")
         set_default_expenditure_type(conn)
 
-        print("\n7. Calculating Earned Value metrics...")
+        print("\n10. Calculating Earned Value metrics...")
         calculate_earned_value_metrics(conn)
 
+        print("\n11. Creating performance indexes...")
+        create_performance_indexes(conn)
+
+        print("\n12. Building contract rollups...")
+        create_contract_rollups(conn)
+
         conn.commit()
         print("\n✓ Migration completed successfully!")
 
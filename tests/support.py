@@ -0,0 +1,103 @@
+"""
+Shared fixtures: a small contracts database in a temporary directory and
+an app pointed at it.
+"""
+
+import contextlib
+import io
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / 'scripts'))
+
+from app import create_app
+from app.config import load_config
+
+import migrate_database
+
+# Columns the dashboard queries read (schema.sql predates several of them)
+CONTRACTS_TABLE = '''
+    CREATE TABLE contracts (
+        id INTEGER PRIMARY KEY,
+        contract_id TEXT UNIQUE,
+        title TEXT,
+        description TEXT,
+        school_name TEXT,
+        vendor_name TEXT,
+        surtax_category TEXT,
+        original_amount REAL,
+        current_amount REAL,
+        total_paid REAL,
+        amount_paid REAL,
+        budget_variance_pct REAL,
+        current_end_date TEXT,
+        status TEXT,
+        percent_complete REAL,
+        is_delayed INTEGER DEFAULT 0,
+        delay_days INTEGER DEFAULT 0,
+        delay_reason TEXT,
+        is_over_budget INTEGER DEFAULT 0,
+        is_deleted INTEGER DEFAULT 0,
+        cost_performance_index REAL
+    )
+'''
+
+# contract_id, title, school, vendor, category, original, current, paid,
+# status, percent complete, is_delayed, delay_days, is_over_budget
+CONTRACTS = [
+    ('C1', 'New classroom wing', 'Forest High', 'Acme Builders', 'New Construction',
+     1_000_000, 1_200_000, 600_000, 'Active', 50, 1, 45, 1),
+    ('C2', 'Roof replacement', 'Belleview Middle', 'RoofPro', 'Roofing',
+     400_000, 400_000, 400_000, 'Completed', 100, 0, 0, 0),
+    ('C3', 'Camera upgrade', 'Forest High', 'Acme Builders', 'Safety & Security',
+     150_000, 150_000, 30_000, 'Active', 20, 1, 10, 0),
+    ('C4', 'HVAC chillers', 'Dunnellon High', 'Cool Air LLC', 'HVAC',
+     800_000, 750_000, 100_000, 'Planned', 5, 0, 0, 0),
+]
+
+
+def create_test_db(path: Path):
+    """Create the contracts fixture plus the tables the migration adds."""
+    conn = sqlite3.connect(str(path))
+    conn.execute(CONTRACTS_TABLE)
+    conn.executemany('''
+        INSERT INTO contracts (
+            contract_id, title, school_name, vendor_name, surtax_category,
+            original_amount, current_amount, total_paid, status, percent_complete,
+            is_delayed, delay_days, is_over_budget
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', CONTRACTS)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate_database.create_user_watchlist_table(conn)
+    conn.commit()
+    conn.close()
+
+
+class TempDatabaseMixin:
+    """Give each test a fresh fixture database and an app using it."""
+
+    def setUp(self):
+        super().setUp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / 'surtax.db'
+        create_test_db(self.db_path)
+
+        load_config.cache_clear()
+        self.app = create_app('marion', {'database': {'path': str(self.db_path)}})
+        self.app.testing = True
+        self.app.secret_key = 'test'
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+        super().tearDown()
+
+    def connect(self) -> sqlite3.Connection:
+        """Open a separate writable connection to the fixture database."""
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        self.addCleanup(conn.close)
+        return conn
@@ -0,0 +1,50 @@
+"""Tests for keyword routing of AI assistant questions."""
+
+import itertools
+import unittest
+
+from app.services import ai_chat
+from app.services.ai_chat import QUESTION_ROUTES, _route_question
+
+
+def first_matching_route(question_lower):
+    """Reference routing: scan the routes in order, as the original loop did."""
+    for handler, keywords in QUESTION_ROUTES:
+        if any(kw in question_lower for kw in keywords):
+            return handler
+    return None
+
+
+class RouteQuestionTests(unittest.TestCase):
+
+    def test_earlier_route_wins_regardless_of_position(self):
+        # 'vendor' (vendor queries) comes first in the question, but
+        # 'delayed' belongs to the higher-priority schedule risk route
+        self.assertIs(_route_question('which vendor is delayed'),
+                      ai_chat._handle_schedule_risks)
+
+    def test_specific_keyword_beats_its_substring(self):
+        self.assertIs(_route_question('who is the top vendor'),
+                      ai_chat._handle_top_vendor)
+
+    def test_overlapping_keywords_are_all_seen(self):
+        # 'school' inside 'high school' routes to the schools handler,
+        # which outranks the specific project route
+        self.assertIs(_route_question('south marion high school'),
+                      ai_chat._handle_schools_by_projects)
+
+    def test_no_keyword(self):
+        self.assertIsNone(_route_question('hello'))
+        self.assertIsNone(_route_question(''))
+
+    def test_matches_reference_for_keyword_pairs(self):
+        keywords = [kw for _, route_keywords in QUESTION_ROUTES for kw in route_keywords]
+        for first, second in itertools.permutations(keywords, 2):
+            for question in (f'{first} {second}', f'{first}{second}'):
+                with self.subTest(question=question):
+                    self.assertIs(_route_question(question),
+                                  first_matching_route(question))
+
+
+if __name__ == '__main__':
+    unittest.main()
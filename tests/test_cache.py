@@ -0,0 +1,84 @@
+"""Tests for the per-app query cache."""
+
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from app import cache
+from app.cache import delete_memoized, memoize
+
+
+class MemoizeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        cache.init_app(self.app)
+        self.calls = []
+
+        @memoize(timeout=60)
+        def lookup(cursor, key):
+            self.calls.append(key)
+            return [key, len(self.calls)]
+
+        @memoize(timeout=60)
+        def other(cursor):
+            self.calls.append('other')
+            return len(self.calls)
+
+        self.lookup = lookup
+        self.other = other
+
+    def test_cached_per_arguments_not_cursor(self):
+        with self.app.app_context():
+            first = self.lookup(object(), 'a')
+            self.assertIs(self.lookup(object(), 'a'), first)
+            self.lookup(None, 'b')
+        self.assertEqual(self.calls, ['a', 'b'])
+
+    def test_expires_after_timeout(self):
+        with self.app.app_context(), mock.patch.object(cache.time, 'monotonic') as clock:
+            clock.return_value = 1000.0
+            self.lookup(None, 'a')
+            clock.return_value = 1059.0
+            self.lookup(None, 'a')
+            self.assertEqual(self.calls, ['a'])
+            clock.return_value = 1060.0
+            self.lookup(None, 'a')
+        self.assertEqual(self.calls, ['a', 'a'])
+
+    def test_uncached_outside_app_context(self):
+        self.lookup(None, 'a')
+        self.lookup(None, 'a')
+        self.assertEqual(self.calls, ['a', 'a'])
+
+    def test_cache_is_per_app(self):
+        other_app = Flask(__name__)
+        cache.init_app(other_app)
+        with self.app.app_context():
+            self.lookup(None, 'a')
+        with other_app.app_context():
+            self.lookup(None, 'a')
+        self.assertEqual(self.calls, ['a', 'a'])
+
+    def test_delete_memoized_drops_only_given_helper(self):
+        with self.app.app_context():
+            self.lookup(None, 'a')
+            self.other(None)
+            delete_memoized(self.lookup)
+            self.lookup(None, 'a')
+            self.other(None)
+        self.assertEqual(self.calls, ['a', 'other', 'a'])
+
+    def test_delete_memoized_without_arguments_clears_all(self):
+        with self.app.app_context():
+            self.lookup(None, 'a')
+            self.other(None)
+            delete_memoized()
+            self.lookup(None, 'a')
+            self.other(None)
+        self.assertEqual(self.calls, ['a', 'other', 'a', 'other'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""Tests for county configuration loading."""
+
+import unittest
+
+from app.config import deep_merge, load_config
+
+
+class LoadConfigTests(unittest.TestCase):
+
+    def setUp(self):
+        load_config.cache_clear()
+        self.addCleanup(load_config.cache_clear)
+
+    def test_loaded_once_per_county(self):
+        self.assertIs(load_config('marion'), load_config('marion'))
+
+    def test_cache_clear_reloads(self):
+        first = load_config('marion')
+        load_config.cache_clear()
+        self.assertIsNot(load_config('marion'), first)
+        self.assertEqual(load_config('marion'), first)
+
+
+class DeepMergeTests(unittest.TestCase):
+
+    def test_nested_override(self):
+        base = {'a': {'x': 1, 'y': 2}, 'b': [1]}
+        override = {'a': {'y': 3}, 'c': 4}
+        self.assertEqual(deep_merge(base, override),
+                         {'a': {'x': 1, 'y': 3}, 'b': [1], 'c': 4})
+
+    def test_inputs_not_modified(self):
+        base = {'a': {'x': 1}}
+        override = {'a': {'x': 2}}
+        merged = deep_merge(base, override)
+        merged['a']['x'] = 3
+        self.assertEqual(base, {'a': {'x': 1}})
+        self.assertEqual(override, {'a': {'x': 2}})
+
+
+if __name__ == '__main__':
+    unittest.main()
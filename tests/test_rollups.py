@@ -0,0 +1,81 @@
+"""Tests for the materialized contract rollups and their fallback."""
+
+import unittest
+
+from app.services.rollups import (
+    ROLLUP_QUERIES, create_rollup_tables, refresh_stale_rollups,
+    rollup_source, rollups_current
+)
+from app.services.stats import get_contract_summary
+from tests.support import TempDatabaseMixin
+
+
+class RollupTests(TempDatabaseMixin, unittest.TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.conn = self.connect()
+
+    def summary(self):
+        return dict(get_contract_summary(self.conn.cursor()))
+
+    def test_missing_tables_fall_back_to_query(self):
+        cursor = self.conn.cursor()
+        self.assertFalse(rollups_current(cursor))
+        self.assertEqual(rollup_source(cursor, 'contract_rollup_summary'),
+                         f"({ROLLUP_QUERIES['contract_rollup_summary']})")
+        self.assertFalse(refresh_stale_rollups(self.conn))
+        self.assertEqual(self.summary()['total_projects'], 4)
+
+    def test_current_rollups_are_read_from_tables(self):
+        create_rollup_tables(self.conn)
+        self.conn.commit()
+        cursor = self.conn.cursor()
+        self.assertTrue(rollups_current(cursor))
+        self.assertEqual(rollup_source(cursor, 'contract_rollup_summary'),
+                         'contract_rollup_summary')
+        self.assertEqual(self.summary()['total_projects'], 4)
+
+    def test_contract_change_falls_back_until_refreshed(self):
+        create_rollup_tables(self.conn)
+        self.conn.commit()
+
+        self.conn.execute("UPDATE contracts SET is_deleted = 1 WHERE contract_id = 'C1'")
+        self.conn.commit()
+
+        cursor = self.conn.cursor()
+        self.assertFalse(rollups_current(cursor))
+        summary = self.summary()
+        self.assertEqual(summary['total_projects'], 3)
+        self.assertEqual(summary['delayed_projects'], 1)
+
+        # The materialized table itself is untouched by readers
+        stored = self.conn.execute(
+            'SELECT total_projects FROM contract_rollup_summary').fetchone()[0]
+        self.assertEqual(stored, 4)
+
+        self.assertTrue(refresh_stale_rollups(self.conn))
+        self.conn.commit()
+        self.assertTrue(rollups_current(cursor))
+        self.assertEqual(self.summary(), summary)
+
+    def test_unrelated_column_update_keeps_rollups_current(self):
+        create_rollup_tables(self.conn)
+        self.conn.commit()
+        self.conn.execute("UPDATE contracts SET title = 'Renamed' WHERE contract_id = 'C1'")
+        self.conn.commit()
+        self.assertTrue(rollups_current(self.conn.cursor()))
+
+    def test_write_request_refreshes_stale_rollups(self):
+        create_rollup_tables(self.conn)
+        self.conn.execute("UPDATE contracts SET status = 'Completed' WHERE contract_id = 'C1'")
+        self.conn.commit()
+        self.assertFalse(rollups_current(self.conn.cursor()))
+
+        response = self.client.post('/api/watchlist/add/C2')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(rollups_current(self.conn.cursor()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""Tests for the watchlist API endpoints and page."""
+
+import unittest
+
+from app.services.watchlist import LEGACY_WATCHLIST_KEY, WATCHLIST_TOKEN_KEY
+from tests.support import TempDatabaseMixin
+
+
+class WatchlistApiTests(TempDatabaseMixin, unittest.TestCase):
+
+    def watched(self):
+        return self.client.get('/api/watchlist').get_json()['watchlist']
+
+    def test_empty_watchlist(self):
+        self.assertEqual(self.client.get('/api/watchlist').get_json(),
+                         {'watchlist': [], 'count': 0})
+
+    def test_add_remove_and_clear(self):
+        self.assertEqual(self.client.post('/api/watchlist/add/C1').get_json(),
+                         {'success': True, 'count': 1})
+        self.assertEqual(self.client.post('/api/watchlist/add/C3').get_json()['count'], 2)
+        # Adding twice is a no-op
+        self.assertEqual(self.client.post('/api/watchlist/add/C1').get_json()['count'], 2)
+        self.assertEqual(self.watched(), ['C1', 'C3'])
+
+        self.assertEqual(self.client.post('/api/watchlist/remove/C1').get_json()['count'], 1)
+        self.assertEqual(self.watched(), ['C3'])
+
+        self.assertEqual(self.client.post('/api/watchlist/clear').get_json(),
+                         {'success': True, 'count': 0})
+        self.assertEqual(self.watched(), [])
+
+    def test_remove_without_watchlist(self):
+        self.assertEqual(self.client.post('/api/watchlist/remove/C1').get_json()['count'], 0)
+        with self.client.session_transaction() as sess:
+            self.assertNotIn(WATCHLIST_TOKEN_KEY, sess)
+
+    def test_toggle(self):
+        response = self.client.post('/api/watchlist/toggle/C2').get_json()
+        self.assertEqual(response, {'success': True, 'is_watched': True, 'count': 1})
+        response = self.client.post('/api/watchlist/toggle/C2').get_json()
+        self.assertEqual(response, {'success': True, 'is_watched': False, 'count': 0})
+
+    def test_watchlists_are_per_session(self):
+        self.client.post('/api/watchlist/add/C1')
+        other = self.app.test_client()
+        self.assertEqual(other.get('/api/watchlist').get_json()['watchlist'], [])
+
+    def test_session_stores_only_token(self):
+        self.client.post('/api/watchlist/add/C1')
+        with self.client.session_transaction() as sess:
+            watchlist_id = sess[WATCHLIST_TOKEN_KEY]
+            self.assertNotIn(LEGACY_WATCHLIST_KEY, sess)
+
+        rows = self.connect().execute(
+            'SELECT session_id, contract_id FROM user_watchlist').fetchall()
+        self.assertEqual([tuple(row) for row in rows], [(watchlist_id, 'C1')])
+
+    def test_legacy_session_watchlist(self):
+        with self.client.session_transaction() as sess:
+            sess[LEGACY_WATCHLIST_KEY] = ['C2', 'C4']
+
+        # Listed as-is until the watchlist next changes
+        self.assertEqual(self.watched(), ['C2', 'C4'])
+
+        self.assertEqual(self.client.post('/api/watchlist/add/C1').get_json()['count'], 3)
+        self.assertEqual(self.watched(), ['C2', 'C4', 'C1'])
+        with self.client.session_transaction() as sess:
+            self.assertNotIn(LEGACY_WATCHLIST_KEY, sess)
+
+    def test_legacy_session_watchlist_remove(self):
+        with self.client.session_transaction() as sess:
+            sess[LEGACY_WATCHLIST_KEY] = ['C2', 'C4']
+
+        self.assertEqual(self.client.post('/api/watchlist/remove/C2').get_json()['count'], 1)
+        self.assertEqual(self.watched(), ['C4'])
+
+    def test_legacy_session_watchlist_clear(self):
+        with self.client.session_transaction() as sess:
+            sess[LEGACY_WATCHLIST_KEY] = ['C2']
+
+        self.client.post('/api/watchlist/clear')
+        self.assertEqual(self.watched(), [])
+
+    def test_page_lists_watched_projects(self):
+        self.client.post('/api/watchlist/add/C1')
+        with self.client.session_transaction() as sess:
+            sess[LEGACY_WATCHLIST_KEY] = ['C4']
+
+        page = self.client.get('/watchlist')
+        self.assertEqual(page.status_code, 200)
+        html = page.get_data(as_text=True)
+        self.assertIn('New classroom wing', html)
+        self.assertIn('HVAC chillers', html)
+        self.assertNotIn('Roof replacement', html)
+
+
+if __name__ == '__main__':
+    unittest.main()